@@ -1,6 +1,5 @@
-from transformers import pipeline
 import pandas as pd
-from typing import Dict, Any, Union
+from typing import Dict, Any, Iterable, Union
 import numpy as np
 from datetime import datetime
 import time
@@ -8,28 +7,124 @@ import threading
 import socket
 import json
 import warnings
-from sklearn.ensemble import IsolationForest
 from collections import deque
-import joblib
 import asyncio
-import websockets
+import logging
 import os
+import sys
+from src.config import settings
+from src.inference import SentimentInferenceEngine
+from src.anomaly import zscore_anomalies
+from src.aggregates import AnalysisAggregate, InsightsAggregator
+from src.model_store import ModelStore
+from src.scoring import BatchScorer
+from src.broadcast import Broadcaster
+from src.timeseries import SENTIMENT_CODES, SENTIMENT_NAMES, TimeSeriesStore
+from src.devices import DeviceRegistry, build_records, combined_load, sentiment_codes, to_epoch
+from src.ingest import IngestServer
+from src.scheduler import TickScheduler, subscription_params
+from src.metrics import (
+    ANALYZER_STAGE_SECONDS, FRAME_ENCODE_SECONDS, JSON_ENCODE_SECONDS, MODEL_PREDICT_SECONDS, TICK_SECONDS,
+    LogSampler, registry, timed
+)
+from src.wire import MSGPACK, SUBPROTOCOLS, encode_samples, negotiated_format
 
 # Suppress the SSL warning
 warnings.filterwarnings('ignore', message='urllib3 v2 only supports OpenSSL')
 
+# Heavy dependencies (transformers, sklearn, websockets, joblib) are imported
+# on first use so that importing this module stays cheap for every worker.
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+
+# Histogram children bound once so the per-tick cost is a perf_counter pair
+PREDICT_TICK_SECONDS = MODEL_PREDICT_SECONDS.labels(path="tick")
+PREDICT_BATCH_SECONDS = MODEL_PREDICT_SECONDS.labels(path="batch")
+ENCODE_TICK_SECONDS = JSON_ENCODE_SECONDS.labels(path="tick")
+ENCODE_MSGPACK_SECONDS = FRAME_ENCODE_SECONDS.labels(format=MSGPACK)
+
+# Numeric columns windowed in the live stream's insights; sentiment stands in for status
+LIVE_INSIGHT_COLUMNS = ['cpu_usage', 'memory_usage', 'combined_load']
+# Simulated ticks are folded into the live insights in batches of this many
+TICK_INSIGHTS_BATCH = 256
+
+def _is_arrow_table(data) -> bool:
+    # A Table only exists once something has imported pyarrow, so don't import it here
+    pa = sys.modules.get('pyarrow')
+    return pa is not None and isinstance(data, pa.Table)
+
+def _nonzero_counts(series: pd.Series) -> Dict[str, int]:
+    """value_counts without the zero rows categorical columns report for unseen categories"""
+    counts = series.value_counts()
+    return counts[counts > 0].to_dict()
+
 class AIAnalyzer:
-    def __init__(self):
-        # Initialize a simpler sentiment analyzer for demo purposes
-        self.text_classifier = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+    def __init__(self, text_classifier=None, warm_up: bool = False,
+                 anomaly_columns=None, anomaly_group_by=None, robust_anomalies=None):
+        # The sentiment model is loaded lazily unless a classifier is injected
+        self._text_classifier = text_classifier
+        self.anomaly_columns = anomaly_columns or settings.ANOMALY_COLUMNS
+        self.anomaly_group_by = anomaly_group_by or settings.ANOMALY_GROUP_BY
+        self.robust_anomalies = settings.ANOMALY_ROBUST if robust_anomalies is None else robust_anomalies
+        self._model_lock = threading.Lock()
+        self.inference_engine = SentimentInferenceEngine(
+            self._run_classifier,
+            batch_size=settings.BATCH_SIZE,
+            cache_size=settings.INFERENCE_CACHE_SIZE
+        )
+        if warm_up:
+            self.warm_up()
+
+    @property
+    def text_classifier(self):
+        """Load the sentiment pipeline on first use"""
+        if self._text_classifier is None:
+            with self._model_lock:
+                if self._text_classifier is None:
+                    from transformers import pipeline
+                    # Initialize a simpler sentiment analyzer for demo purposes
+                    self._text_classifier = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+        return self._text_classifier
+
+    @property
+    def is_model_loaded(self) -> bool:
+        return self._text_classifier is not None
+
+    def warm_up(self, background: bool = True):
+        """Load the sentiment model now, optionally in a daemon thread"""
+        if not background:
+            self.text_classifier
+            return None
+        thread = threading.Thread(target=lambda: self.text_classifier, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _run_classifier(self, texts, **kwargs):
+        return self.text_classifier(texts, **kwargs)
+
+    @property
+    def analysis_columns(self):
+        """Source columns this analyzer reads beyond the pipeline's base columns"""
+        return self.anomaly_columns + ([self.anomaly_group_by] if self.anomaly_group_by else [])
+
+    def config_key(self) -> str:
+        """The options that shape analyze() results, for result cache keys"""
+        return (f"columns={','.join(self.anomaly_columns)}:group_by={self.anomaly_group_by}:"
+                f"robust={self.robust_anomalies}:threshold={settings.ANOMALY_THRESHOLD}")
     
-    def analyze(self, data: Union[pd.DataFrame, list]) -> Dict[str, Any]:
+    def analyze(self, data: Union[pd.DataFrame, list, Iterable[pd.DataFrame]]) -> Dict[str, Any]:
         """
-        Perform AI-powered analysis on the data
+        Perform AI-powered analysis on the data.
+
+        Accepts a DataFrame (used as-is, without copying), a pyarrow Table,
+        a list of records, or an iterable of DataFrame chunks.
         """
         # Convert list back to DataFrame if needed
         if isinstance(data, list):
             data = pd.DataFrame(data)
+        elif _is_arrow_table(data):
+            data = data.to_pandas()
+        elif not isinstance(data, pd.DataFrame):
+            return self._analyze_stream(data)
         
         results = {
             "classifications": self._classify_data(data),
@@ -39,116 +134,276 @@ class AIAnalyzer:
         
         return results
     
+    def _analyze_stream(self, chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """Fold chunks into mergeable partial aggregates so memory stays bounded"""
+        aggregate = None
+        for chunk in chunks:
+            if aggregate is None:
+                columns = [col for col in self.anomaly_columns if col in chunk.columns]
+                aggregate = AnalysisAggregate(columns, threshold=settings.ANOMALY_THRESHOLD)
+            sentiments = self.inference_engine.classify(chunk['notes'])
+            aggregate.add_sentiments(sentiments['sentiment_label'], sentiments['sentiment_score'])
+            aggregate.update(chunk)
+
+        if aggregate is None:
+            aggregate = AnalysisAggregate(self.anomaly_columns)
+        results = aggregate.result()
+        results["classifications"]["inference_stats"] = self.inference_engine.get_stats()
+        return results
+
+    @timed(ANALYZER_STAGE_SECONDS.labels(stage="classify"))
     def _classify_data(self, data: pd.DataFrame):
         """Classify the status of measurements"""
-        # Analyze text data from notes
-        sample_notes = data['notes'].head(5).tolist()
-        classifications = self.text_classifier(sample_notes)
+        # Classify every note; identical notes are deduplicated and cached
+        self.inference_engine.attach(data, column='notes')
+        sample = data[['sentiment_label', 'sentiment_score']].head(5)
         
         # Convert to serializable format
         return {
             "text_sentiment": [
-                {"label": c["label"], "score": float(c["score"])}  # Convert numpy float to Python float
-                for c in classifications
+                {"label": label, "score": score}
+                for label, score in sample.itertuples(index=False)
             ],
-            "status_distribution": data['status'].value_counts().to_dict()
+            "sentiment_distribution": data['sentiment_label'].value_counts().to_dict(),
+            "status_distribution": _nonzero_counts(data['status']),
+            "inference_stats": self.inference_engine.get_stats()
         }
     
+    @timed(ANALYZER_STAGE_SECONDS.labels(stage="anomalies"))
     def _detect_anomalies(self, data: pd.DataFrame):
         """Detect anomalies in numerical measurements"""
-        anomalies = {
-            "temperature": self._find_anomalies(data['temperature']),
-            "humidity": self._find_anomalies(data['humidity']),
-            "pressure": self._find_anomalies(data['pressure'])
-        }
-        return anomalies
+        columns = [col for col in self.anomaly_columns if col in data.columns]
+        return zscore_anomalies(
+            data,
+            columns,
+            group_by=self.anomaly_group_by,
+            robust=self.robust_anomalies,
+            threshold=settings.ANOMALY_THRESHOLD
+        )
     
+    @timed(ANALYZER_STAGE_SECONDS.labels(stage="insights"))
     def _generate_insights(self, data: pd.DataFrame):
         """Generate basic insights from the data"""
-        # Convert the groupby result to a more JSON-friendly format
-        device_summary = []
-        for (device, status), count in data.groupby('device_id')['status'].value_counts().items():
-            device_summary.append({
-                "device_id": device,
-                "status": status,
-                "count": int(count)  # Convert numpy.int64 to native int
-            })
+        # The same incremental aggregator the streaming path folds chunks into
+        columns = [col for col in self.anomaly_columns if col in data.columns]
+        return InsightsAggregator(columns).update(data).result()
 
-        return {
-            "total_records": int(len(data)),
-            "time_range": {
-                "start": data['timestamp'].min(),
-                "end": data['timestamp'].max()
-            },
-            "critical_events": int(len(data[data['status'] == 'critical'])),
-            "device_summary": device_summary
-        }
-    
-    def _find_anomalies(self, series: pd.Series):
-        """Simple anomaly detection using z-score"""
-        z_scores = np.abs((series - series.mean()) / series.std())
-        anomalies = series[z_scores > 3]
-        return {
-            "count": int(len(anomalies)),  # Convert numpy int to Python int
-            "values": {
-                str(k): float(v)  # Convert indices and values to native Python types
-                for k, v in anomalies.head(5).items()
-            }
-        } 
 
 class DeviceAnalyzer:
-    def __init__(self):
-        self.sentiment_levels = ['Normal', 'Stressed', 'Fatigued', 'Critical']
+    MODEL_NAME = "isolation_forest"
+    DEVICE_ID = "local"
+
+    def __init__(self, model_store: ModelStore = None, simulate: bool = None):
+        self.sentiment_levels = list(SENTIMENT_NAMES)
+        # The simulator drives the stream unless real devices push metrics to the ingest server
+        self.simulate = settings.SIMULATE_METRICS if simulate is None else simulate
         self.running = True
         self.server = None
         self.loop = None
-        self.websocket = None
-        self.history = deque(maxlen=100)
-        self.anomaly_detector = IsolationForest(contamination=0.15, random_state=42)
+        self.logger = logging.getLogger(__name__)
+        self._log_tick = LogSampler(settings.TICK_LOG_EVERY)
+        self.broadcaster = Broadcaster(max_queue=settings.WS_SEND_QUEUE_SIZE)
+        self.tick_interval = settings.TICK_INTERVAL
+        self.scheduler = TickScheduler(self.tick_interval, min_period=settings.TICK_MIN_INTERVAL)
+        self.history = deque(maxlen=settings.MODEL_WINDOW_SIZE)
+        self.store = TimeSeriesStore(
+            settings.TIMESERIES_PATH,
+            ring_rows=settings.TIMESERIES_RING_ROWS,
+            segment_rows=settings.TIMESERIES_SEGMENT_ROWS
+        )
+        self.devices = DeviceRegistry(self.store)
+        self.ingest_server = None
+        # One insights aggregator for the whole live stream, fed by ingested batches and ticks
+        self.insights = InsightsAggregator(LIVE_INSIGHT_COLUMNS)
+        self._insights_lock = threading.Lock()
+        self._pending_ticks = []
+        self._anomaly_detector = None
         self.is_model_trained = False
         self.port = 5001
 
+        # Model lifecycle: refits run in a worker thread and swap in atomically
+        self.model_store = model_store or ModelStore(settings.MODEL_PATH)
+        self._model_checked = False
+        self._samples_since_fit = 0
+        self._refit_executor = None
+        self._refit_future = None
+        self._last_refit = None
+        self._ingest_executor = None
+        self._scorer = None
+        self._register_collectors()
+
+    def _register_collectors(self):
+        """Expose component stats on /metrics; read only when scraped"""
+        registry.register_collector("ws_broadcast", lambda: {
+            **self.broadcaster.stats, "subscribers": len(self.broadcaster.subscribers)
+        })
+        registry.register_collector("scoring", lambda: self._scorer.stats if self._scorer else {})
+        registry.register_collector("tick_scheduler", lambda: self.scheduler.stats)
+        registry.register_collector("ingest", lambda: self.ingest_server.stats if self.ingest_server else {})
+        registry.register_collector("timeseries", self.store.get_stats)
+        registry.register_collector("devices", lambda: {**self.devices.stats, "count": len(self.devices.devices)})
+        registry.register_collector("device_model", lambda: {
+            "trained": int(self.is_model_trained), "window": len(self.history)
+        })
+
+    @property
+    def anomaly_detector(self):
+        """Create the IsolationForest on first use to keep sklearn out of startup"""
+        if self._anomaly_detector is None:
+            from sklearn.ensemble import IsolationForest
+            self._anomaly_detector = IsolationForest(contamination=0.15, random_state=42)
+        return self._anomaly_detector
+
+    def _warm_start(self):
+        """Load the last persisted model and its training window, if any"""
+        self._model_checked = True
+        stored = self.model_store.load(self.MODEL_NAME)
+        if stored is None:
+            return
+        self.history.extend(stored.get("window", []))
+        self._anomaly_detector = stored["model"]
+        self.is_model_trained = True
+        print(f"ML Model loaded from {self.model_store.path}")
+
+    def _fit_model(self, window):
+        """Fit a fresh IsolationForest on a snapshot of the history (worker thread)"""
+        from sklearn.ensemble import IsolationForest
+        model = IsolationForest(contamination=0.15, random_state=42)
+        model.fit(window)
+        try:
+            self.model_store.save(self.MODEL_NAME, model, window=window.tolist())
+        except Exception as e:
+            print(f"Error persisting model: {e}")
+        return model
+
+    def _on_refit_done(self, future):
+        try:
+            model = future.result()
+        except Exception as e:
+            print(f"Error refitting model: {e}")
+            return
+        # Swap the reference before flipping the flag so readers never see an unfitted model
+        self._anomaly_detector = model
+        self.is_model_trained = True
+        print("ML Model trained with historical data")
+
+    def _maybe_refit(self):
+        """
+        Schedule a background refit on the sliding window when one is due.
+
+        Once a model exists, a refit needs both MODEL_REFIT_INTERVAL new
+        samples and MODEL_REFIT_MIN_SECONDS since the last one, so a fleet
+        pushing large batches doesn't refit and re-save the window back to back.
+        """
+        if len(self.history) < settings.MODEL_MIN_SAMPLES:
+            return
+        if self.is_model_trained:
+            if self._samples_since_fit < settings.MODEL_REFIT_INTERVAL:
+                return
+            if self._last_refit is not None and time.monotonic() - self._last_refit < settings.MODEL_REFIT_MIN_SECONDS:
+                return
+        if self._refit_future is not None and not self._refit_future.done():
+            return
+
+        if self._refit_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._refit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-refit")
+
+        window = np.array(self.history, dtype=np.float64)
+        self._samples_since_fit = 0
+        self._last_refit = time.monotonic()
+        self._refit_future = self._refit_executor.submit(self._fit_model, window)
+        self._refit_future.add_done_callback(self._on_refit_done)
+
+    def _record_sample(self, metrics):
+        """Append a sample to the training window and trigger refits when due"""
+        if not self._model_checked:
+            self._warm_start()
+
+        self.history.append([metrics['cpu_usage'], metrics['memory_usage']])
+        self._samples_since_fit += 1
+        self._maybe_refit()
+
+    def _sentiment_from_prediction(self, prediction, combined_load):
+        """Map an IsolationForest prediction and the combined load to a sentiment"""
+        code = sentiment_codes(np.array([combined_load], dtype=np.float64), [prediction])[0]
+        return SENTIMENT_NAMES[code]
+
     def analyze_sentiment_with_ml(self, metrics):
         """Use ML to analyze device sentiment based on patterns"""
-        self.history.append([metrics['cpu_usage'], metrics['memory_usage']])
+        self._record_sample(metrics)
         
         # Make sentiment more dynamic based on both CPU and Memory
         combined_load = (metrics['cpu_usage'] * 0.7) + (metrics['memory_usage'] * 0.3)
-        
-        if len(self.history) >= 20 and not self.is_model_trained:
-            self.anomaly_detector.fit(list(self.history))
-            self.is_model_trained = True
-            print("ML Model trained with historical data")
 
         if self.is_model_trained:
             current_data = [[metrics['cpu_usage'], metrics['memory_usage']]]
-            prediction = self.anomaly_detector.predict(current_data)[0]
-            
-            # More dynamic sentiment analysis
-            if prediction == -1:  # Anomaly detected
-                if combined_load > 85:
-                    return 'Critical'
-                return 'Stressed'
-            else:
-                if combined_load > 70:
-                    return 'Fatigued'
-                if combined_load > 50:
-                    return 'Normal'
-                return 'Normal'
+            with PREDICT_TICK_SECONDS.time():
+                prediction = self.anomaly_detector.predict(current_data)[0]
+            return self._sentiment_from_prediction(prediction, combined_load)
+        else:
+            return self.analyze_sentiment_basic(metrics)
+
+    @property
+    def scorer(self):
+        """Micro-batching scorer shared by every connection on the event loop"""
+        if self._scorer is None:
+            self._scorer = BatchScorer(
+                lambda: self.anomaly_detector,
+                max_latency=settings.SCORING_MAX_LATENCY_MS / 1000,
+                max_batch_size=settings.SCORING_MAX_BATCH_SIZE
+            )
+        return self._scorer
+
+    async def analyze_sentiment_async(self, metrics):
+        """Like analyze_sentiment_with_ml, but scores through the micro-batching scorer"""
+        self._record_sample(metrics)
+        combined_load = (metrics['cpu_usage'] * 0.7) + (metrics['memory_usage'] * 0.3)
+
+        if self.is_model_trained:
+            prediction, _ = await self.scorer.score([metrics['cpu_usage'], metrics['memory_usage']])
+            return self._sentiment_from_prediction(prediction, combined_load)
         else:
             return self.analyze_sentiment_basic(metrics)
 
     def analyze_sentiment_basic(self, metrics):
         """Basic rule-based sentiment analysis"""
         combined_load = (metrics['cpu_usage'] * 0.7) + (metrics['memory_usage'] * 0.3)
-        
-        if combined_load > 85:
-            return 'Critical'
-        elif combined_load > 70:
-            return 'Stressed'
-        elif combined_load > 50:
-            return 'Fatigued'
-        return 'Normal'
+        code = sentiment_codes(np.array([combined_load], dtype=np.float64))[0]
+        return SENTIMENT_NAMES[code]
+
+    def classify_batch(self, cpu_usage, memory_usage, use_model: bool = None):
+        """
+        Vectorized sentiment for arrays of samples of any matching shape
+        (e.g. one entry per device, or devices x time steps).
+
+        Uses the same rules as `analyze_sentiment_with_ml` when the model is
+        trained (or `use_model` is set) and `analyze_sentiment_basic` otherwise,
+        with one IsolationForest `predict` call for the whole batch. Returns
+        `combined_load`, the model's `anomaly` labels (-1/1, or None) and int8
+        `sentiment` codes indexing `self.sentiment_levels`. Samples are not
+        added to the training window.
+        """
+        cpu = np.asarray(cpu_usage, dtype=np.float64)
+        mem = np.asarray(memory_usage, dtype=np.float64)
+        load = combined_load(cpu, mem)
+        if use_model is None:
+            use_model = self.is_model_trained
+
+        predictions = None
+        if use_model and cpu.size:
+            rows = np.column_stack([cpu.ravel(), mem.ravel()])
+            with PREDICT_BATCH_SECONDS.time():
+                predictions = self.anomaly_detector.predict(rows).astype(np.int8).reshape(cpu.shape)
+        return {
+            "combined_load": load,
+            "anomaly": predictions,
+            "sentiment": sentiment_codes(load, predictions)
+        }
+
+    def sentiment_labels(self, codes):
+        """Map int8 sentiment codes from `classify_batch` back to their names"""
+        return np.asarray(self.sentiment_levels)[codes]
 
     def simulate_device_metrics(self):
         """Simulate more realistic device metrics with patterns"""
@@ -174,58 +429,255 @@ class DeviceAnalyzer:
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
+    async def ingest_batch_async(self, samples):
+        """
+        Run `ingest_batch` in the ingest worker thread.
+
+        Scoring, refit scheduling and time-series spills are CPU and disk
+        work that must not stall websocket sends; one worker keeps batches
+        in arrival order and off each other's state.
+        """
+        if self._ingest_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._ingest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        return await asyncio.get_running_loop().run_in_executor(self._ingest_executor, self.ingest_batch, samples)
+
+    def ingest_batch(self, samples):
+        """
+        Score a batch of pushed `{device_id, cpu_usage, memory_usage, timestamp}`
+        samples and route them to per-device state and history.
+
+        The whole batch shares one IsolationForest `predict` call, fitted on
+        the fleet-wide sliding window.
+        """
+        if not self._model_checked:
+            self._warm_start()
+
+        count = len(samples)
+        device_ids = np.array([str(sample.get('device_id', self.DEVICE_ID)) for sample in samples])
+        cpu = np.fromiter((sample['cpu_usage'] for sample in samples), dtype=np.float64, count=count)
+        mem = np.fromiter((sample['memory_usage'] for sample in samples), dtype=np.float64, count=count)
+        timestamps = to_epoch([sample.get('timestamp') for sample in samples])
+        rows = np.column_stack([cpu, mem])
+
+        self.history.extend(rows[-self.history.maxlen:].tolist())
+        self._samples_since_fit += count
+        self._maybe_refit()
+
+        scored = self.classify_batch(cpu, mem)
+        load = np.round(scored['combined_load'], 2)
+        self.devices.route(device_ids, build_records(timestamps, cpu, mem, load, scored['sentiment']))
+        self._update_insights(device_ids, timestamps, cpu, mem, load, scored['sentiment'])
+        return count
+
+    def _update_insights(self, device_ids, timestamps, cpu, mem, load, codes):
+        """Fold scored samples into the live insights; the lower-cased sentiment is the status"""
+        statuses = np.asarray([level.lower() for level in self.sentiment_levels])
+        frame = pd.DataFrame({
+            'timestamp': pd.to_datetime(np.asarray(timestamps, dtype=np.float64), unit='s'),
+            'device_id': device_ids,
+            'status': statuses[np.asarray(codes, dtype=np.int64)],
+            'cpu_usage': cpu,
+            'memory_usage': mem,
+            'combined_load': load
+        })
+        with self._insights_lock:
+            self.insights.update(frame)
+
+    def _record_tick_insight(self, timestamp, cpu, mem, load, sentiment):
+        """Queue one simulated tick; a groupby per tick would cost more than the tick itself"""
+        with self._insights_lock:
+            self._pending_ticks.append((self.DEVICE_ID, timestamp, cpu, mem, load, SENTIMENT_CODES[sentiment]))
+            full = len(self._pending_ticks) >= TICK_INSIGHTS_BATCH
+        if full:
+            self._flush_tick_insights()
+
+    def _flush_tick_insights(self):
+        with self._insights_lock:
+            pending, self._pending_ticks = self._pending_ticks, []
+        if pending:
+            device_ids, timestamps, cpu, mem, load, codes = (np.asarray(column) for column in zip(*pending))
+            self._update_insights(device_ids, timestamps, cpu, mem, load, codes)
+
+    def live_insights(self):
+        """The insights section for everything the live stream has seen, read in O(devices)"""
+        self._flush_tick_insights()
+        with self._insights_lock:
+            return self.insights.result()
+
+    def device_snapshots(self):
+        """Latest sample and sentiment counts for every device that has reported"""
+        return [
+            state.snapshot(self.sentiment_levels)
+            for state in list(self.devices.devices.values()) if state.last is not None
+        ]
+
+    def latest_ingested_tick(self):
+        """Frame for the most recently reporting device, or None before any data arrives"""
+        state = self.devices.latest()
+        if state is None:
+            return None
+        return self.device_tick(state)
+
+    def device_tick(self, state):
+        """Dashboard frame for one ingested device"""
+        data = state.snapshot(self.sentiment_levels)
+        del data['sentiment_counts']
+        data['timestamp'] = datetime.fromtimestamp(data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        data['ml_enabled'] = self.is_model_trained
+        return data
+
+    async def build_tick(self):
+        """Simulate and analyze one tick; computed once and shared by every client"""
+        if not self.simulate:
+            return self.latest_ingested_tick()
+        metrics = self.simulate_device_metrics()
+        sentiment = await self.analyze_sentiment_async(metrics)
+        combined_load = round((metrics['cpu_usage'] * 0.7) + (metrics['memory_usage'] * 0.3), 2)
+        now = time.time()
+        self.store.append(
+            self.DEVICE_ID, now, metrics['cpu_usage'], metrics['memory_usage'], combined_load, sentiment
+        )
+        self._record_tick_insight(now, metrics['cpu_usage'], metrics['memory_usage'], combined_load, sentiment)
+        
+        return {
+            **metrics,
+            'sentiment': sentiment,
+            'combined_load': combined_load,
+            'ml_enabled': self.is_model_trained
+        }
+
+    def query_history(self, device_id=None, start=None, end=None, step=None):
+        """Stored metrics for a device in [start, end) epoch seconds, bucketed by `step` seconds"""
+        records = self.store.query(device_id or self.DEVICE_ID, start, end, step)
+        if step:
+            return {key: values.tolist() for key, values in records.items()}
+        return {
+            "timestamp": records['timestamp'].tolist(),
+            "cpu": records['cpu'].tolist(),
+            "mem": records['mem'].tolist(),
+            "combined_load": records['combined_load'].tolist(),
+            "sentiment": [self.sentiment_levels[code] if code >= 0 else None for code in records['sentiment']]
+        }
+
+    async def produce(self):
+        """
+        Single producer loop: analyze each tick once and broadcast the serialized frames.
+
+        Ticks come from a drift-corrected monotonic scheduler running at the
+        fastest subscriber's rate; slower subscribers get every n-th tick.
+        """
+        while self.running:
+            self.scheduler.set_period(self.broadcaster.min_interval or self.tick_interval)
+            tick = await self.scheduler.wait()
+            if self.broadcaster.subscribers:
+                now = time.time()
+                with TICK_SECONDS.time():
+                    data = await self.build_tick()
+                if data is not None:
+                    self.broadcaster.publish_due(
+                        lambda fmt, device, interval: self.encode_frame(data, now, fmt, device, interval),
+                        tick, slack=self.scheduler.period / 2
+                    )
+                    if self._log_tick():
+                        self.logger.info(
+                            "tick sent sentiment=%s combined_load=%s ml_enabled=%s clients=%d ticks=%d",
+                            data['sentiment'], data['combined_load'], data['ml_enabled'],
+                            len(self.broadcaster.subscribers), self._log_tick.seen
+                        )
+
+    def tick_samples(self, data, now, device=None, interval=None):
+        """
+        Samples for a binary frame: the simulated tick, or every device (or
+        just the focused one) updated within the subscriber's interval.
+
+        The window overlaps the previous frame by one producer period so a
+        late tick never misses a device; clients dedupe on the sample timestamp.
+        """
+        if self.simulate:
+            return [(self.DEVICE_ID, now, data['cpu_usage'], data['memory_usage'],
+                     data['combined_load'], SENTIMENT_CODES[data['sentiment']])]
+        since = time.monotonic() - (interval or self.tick_interval) - self.scheduler.period
+        return [
+            (state.device_id, float(state.last['timestamp']), float(state.last['cpu']), float(state.last['mem']),
+             float(state.last['combined_load']), int(state.last['sentiment']))
+            for state in self.devices.changed_since(since)
+            if device is None or state.device_id == device
+        ]
+
+    def encode_frame(self, data, now, fmt, device=None, interval=None):
+        """Serialize one tick for every subscriber sharing a format, focused device and rate"""
+        if device is not None and not self.simulate:
+            state = self.devices.devices.get(device)
+            if state is None or state.last is None:
+                return None
+            data = self.device_tick(state)
+        if fmt == MSGPACK:
+            with ENCODE_MSGPACK_SECONDS.time():
+                return encode_samples(self.tick_samples(data, now, device, interval), self.is_model_trained)
+        # JSON stays the dashboard's format
+        with ENCODE_TICK_SECONDS.time():
+            return json.dumps(data)
+
+    async def handle_client(self, websocket):
+        import websockets
+
+        # Clients opt into binary frames with the sda.msgpack.v1 subprotocol, and
+        # choose their rate and focus in the URL, e.g. ws://host:5002/?rate=10&device=device_3
+        params = subscription_params(websocket.path, self.tick_interval, settings.TICK_MIN_INTERVAL)
+        subscriber = self.broadcaster.subscribe(websocket, negotiated_format(websocket.subprotocol), **params)
+        # Per-connection events are debug-level; thousands of clients would flood info
+        self.logger.debug("client connected path=%s subprotocol=%s", websocket.path, websocket.subprotocol)
+        try:
+            await self.broadcaster.pump(subscriber)
+        except websockets.exceptions.ConnectionClosed:
+            self.logger.debug("client disconnected path=%s", websocket.path)
+        except Exception:
+            self.logger.exception("Error in websocket handler")
+        finally:
+            self.broadcaster.unsubscribe(subscriber)
+
+    async def serve(self, port):
+        """Run the websocket server and its producer until the server closes"""
+        import websockets
+
+        self.server = await websockets.serve(
+            self.handle_client, 
+            "0.0.0.0", 
+            port,
+            reuse_address=True,
+            close_timeout=1,
+            subprotocols=list(SUBPROTOCOLS),
+            # permessage-deflate, negotiated per client
+            compression="deflate" if settings.WS_COMPRESSION else None
+        )
+        print(f"WebSocket server running on port {port}")
+        if settings.INGEST_ENABLED:
+            self.ingest_server = IngestServer(
+                self.ingest_batch_async, port=settings.INGEST_PORT, max_line_bytes=settings.INGEST_MAX_LINE_BYTES
+            )
+            await self.ingest_server.start()
+        producer = asyncio.get_running_loop().create_task(self.produce())
+        try:
+            await self.server.wait_closed()
+        finally:
+            producer.cancel()
+            if self.ingest_server is not None:
+                await self.ingest_server.stop()
+                self.ingest_server = None
+
     def start_server(self, port=None):
         try:
-            import websockets
-            import asyncio
-            
             # Use a different port for WebSocket (5002)
             if port is None:
                 port = int(os.environ.get('WS_PORT', 5002))  # Changed from 5001 to 5002
             
             print(f"Starting WebSocket server on port {port}")
 
-            async def handler(websocket):
-                print(f"New client connected!")
-                self.websocket = websocket
-                try:
-                    while self.running:
-                        metrics = self.simulate_device_metrics()
-                        sentiment = self.analyze_sentiment_with_ml(metrics)
-                        combined_load = round((metrics['cpu_usage'] * 0.7) + (metrics['memory_usage'] * 0.3), 2)
-                        
-                        data = {
-                            **metrics,
-                            'sentiment': sentiment,
-                            'combined_load': combined_load,
-                            'ml_enabled': self.is_model_trained
-                        }
-                        print(f"Sending data: {data}")
-                        await websocket.send(json.dumps(data))
-                        await asyncio.sleep(2)
-                except websockets.exceptions.ConnectionClosed:
-                    print("Client disconnected")
-                except Exception as e:
-                    print(f"Error in handler: {e}")
-                finally:
-                    self.websocket = None
-                    print("Handler finished")
-
-            async def start_server_async():
-                self.server = await websockets.serve(
-                    handler, 
-                    "0.0.0.0", 
-                    port,
-                    reuse_address=True,
-                    close_timeout=1
-                )
-                print(f"WebSocket server running on port {port}")
-                await self.server.wait_closed()
-
             self.loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self.loop)
             self.running = True
-            self.loop.run_until_complete(start_server_async())
+            self.loop.run_until_complete(self.serve(port))
             
         except Exception as e:
             print(f"Error starting server: {e}")
@@ -235,6 +687,14 @@ class DeviceAnalyzer:
         print("Stopping server...")
         self.running = False
 
+        if self._refit_executor is not None:
+            self._refit_executor.shutdown(wait=False)
+            self._refit_executor = None
+        if self._ingest_executor is not None:
+            self._ingest_executor.shutdown(wait=True)
+            self._ingest_executor = None
+        self.store.flush()
+
         try:
             if self.server:
                 self.server.close()
@@ -261,7 +721,8 @@ class DeviceAnalyzer:
             # Reset all attributes
             self.server = None
             self.loop = None
-            self.websocket = None
+            self.broadcaster.subscribers.clear()
+            self._scorer = None
             
             print("Server stopped successfully")
         except Exception as e:
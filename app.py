@@ -1,5 +1,7 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
 from ai_analyzer import DeviceAnalyzer
+from src.metrics import registry
+from src.serialization import dumps
 import threading
 import json
 import os
@@ -47,6 +49,35 @@ def stop_analyzer():
         print(f"Error stopping analyzer: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/history')
+@app.route('/history/<device_id>')
+def history(device_id=None):
+    try:
+        return jsonify(device_analyzer.query_history(
+            device_id,
+            start=request.args.get('start', type=float),
+            end=request.args.get('end', type=float),
+            step=request.args.get('step', type=float)
+        ))
+    except Exception as e:
+        print(f"Error querying history: {e}")
+        return jsonify({"status": "error", "message": str(e)})
+
+@app.route('/devices')
+def devices():
+    # Latest state of every device pushing metrics to the ingest server
+    return jsonify(device_analyzer.device_snapshots())
+
+@app.route('/insights')
+def insights():
+    # Status counts, critical events and 1m/5m/1h windows over the live stream
+    return Response(dumps(device_analyzer.live_insights()), mimetype='application/json')
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus text exposition format
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # In local development, this will use 5000
     # On Render, this will use whatever PORT they assign
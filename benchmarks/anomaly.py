@@ -0,0 +1,63 @@
+"""Compare per-column pandas z-scores with the single-pass NumPy path.
+
+    python benchmarks/anomaly.py --rows 1000000
+"""
+import argparse
+
+import numpy as np
+
+from common import best_of
+
+from src.data_handlers.sample_data import generate_sample_data
+from src.anomaly import zscore_anomalies
+
+COLUMNS = ["temperature", "humidity", "pressure"]
+
+
+def legacy_anomalies(data):
+    """The original AIAnalyzer._find_anomalies, called once per column"""
+    results = {}
+    for column in COLUMNS:
+        series = data[column]
+        z_scores = np.abs((series - series.mean()) / series.std())
+        anomalies = series[z_scores > 3]
+        results[column] = {
+            "count": int(len(anomalies)),
+            "values": {str(k): float(v) for k, v in anomalies.head(5).items()}
+        }
+    return results
+
+
+def comparable(anomalies):
+    """Index keys as strings and plain numbers, the way the response serializes them"""
+    return {
+        column: {"count": int(result["count"]), "values": {str(k): float(v) for k, v in result["values"].items()}}
+        for column, result in anomalies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = generate_sample_data(rows=args.rows)
+
+    legacy_time, legacy = best_of(lambda: legacy_anomalies(data), args.repeat)
+    vector_time, vector = best_of(lambda: zscore_anomalies(data, COLUMNS), args.repeat)
+    assert legacy == comparable(vector), "vectorized results differ from the per-column baseline"
+
+    print(f"rows: {args.rows:,}")
+    print(f"per-column pandas : {legacy_time * 1000:8.1f} ms")
+    print(f"single-pass numpy : {vector_time * 1000:8.1f} ms   ({legacy_time / vector_time:.1f}x)")
+
+    for label, kwargs in [("grouped by device", {"group_by": "device_id"}),
+                          ("robust median/MAD", {"robust": True}),
+                          ("grouped + robust", {"group_by": "device_id", "robust": True})]:
+        elapsed, _ = best_of(lambda: zscore_anomalies(data, COLUMNS, **kwargs), args.repeat)
+        print(f"{label:18s}: {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
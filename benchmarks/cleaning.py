@@ -0,0 +1,39 @@
+"""Compare memory footprint and wall time of the legacy and lean cleaning paths.
+
+    python benchmarks/cleaning.py --rows 1000000
+"""
+import argparse
+import time
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from src.data_handlers.sample_data import generate_sample_data
+from src.data_pipeline import DataPipeline
+
+
+def megabytes(frame):
+    return frame.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = generate_sample_data(rows=args.rows)
+    print(f"rows: {args.rows:,}   raw frame: {megabytes(data):8.1f} MB")
+
+    for label, lean in [("legacy", False), ("lean", True)]:
+        pipeline = DataPipeline(lean=lean)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            cleaned = pipeline._clean_data(data)
+            timings.append(time.perf_counter() - start)
+        print(f"{label:7s} cleaned: {megabytes(cleaned):8.1f} MB   {min(timings) * 1000:8.1f} ms")
+        print("         " + ", ".join(f"{col}={dtype}" for col, dtype in cleaned.dtypes.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Shared setup and timing helpers for the benchmark scripts.
+
+Importing this module puts the repository root on sys.path, so the scripts
+run as ``python benchmarks/<name>.py`` can import ``src`` and ``ai_analyzer``.
+"""
+import builtins
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def timed(fn):
+    """(seconds, result) of one call"""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def best_of(fn, repeat=5):
+    """(fastest seconds, last result) over `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        elapsed, result = timed(fn)
+        timings.append(elapsed)
+    return min(timings), result
+
+
+def constant_classifier(texts, **kwargs):
+    """Stands in for the sentiment model so benchmarks run offline and time only our code"""
+    return [{"label": "POSITIVE", "score": 1.0} for _ in texts]
+
+
+class quiet:
+    """Silence the analyzer's start/stop and model prints while measuring"""
+
+    def __enter__(self):
+        self.real_print = builtins.print
+        builtins.print = lambda *a, **k: None
+
+    def __exit__(self, *exc):
+        builtins.print = self.real_print
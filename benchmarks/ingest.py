@@ -0,0 +1,92 @@
+"""Push simulated device metrics into the ingest server and report throughput.
+
+DeviceAnalyzer.simulate_device_metrics acts as the load generator: each
+sample is tagged with one of --devices device ids and an epoch timestamp,
+then sent as newline-delimited JSON or msgpack batches over one TCP
+connection per sender:
+
+    python benchmarks/ingest.py --samples 200000 --devices 1000 --format msgpack
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from ai_analyzer import DeviceAnalyzer
+from src.ingest import IngestServer
+
+
+def generate_samples(analyzer, count, devices):
+    start = time.time()
+    samples = []
+    for i in range(count):
+        metrics = analyzer.simulate_device_metrics()
+        samples.append({
+            "device_id": f"device_{i % devices}",
+            "cpu_usage": metrics["cpu_usage"],
+            "memory_usage": metrics["memory_usage"],
+            "timestamp": start + i / devices
+        })
+    return samples
+
+
+def encode(samples, fmt, batch_size):
+    batches = [samples[i:i + batch_size] for i in range(0, len(samples), batch_size)]
+    if fmt == "msgpack":
+        import msgpack
+        return b"".join(msgpack.packb(batch) for batch in batches)
+    import orjson
+    return b"".join(orjson.dumps(batch) + b"\n" for batch in batches)
+
+
+async def send(port, payload):
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(payload)
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args):
+    import builtins
+
+    builtins.print, real_print = (lambda *a, **k: None), builtins.print
+    from src.config import settings
+    settings.TIMESERIES_PATH = tempfile.mkdtemp(prefix="ingest-bench-")
+    analyzer = DeviceAnalyzer(simulate=False)
+    builtins.print = real_print
+
+    samples = generate_samples(analyzer, args.samples, args.devices)
+    payloads = [encode(samples[i::args.senders], args.format, args.batch_size) for i in range(args.senders)]
+
+    server = IngestServer(analyzer.ingest_batch_async, host="127.0.0.1", port=args.port)
+    await server.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(send(args.port, payload) for payload in payloads))
+    while analyzer.devices.stats["samples"] < args.samples and not server.stats["errors"]:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    await server.stop()
+    analyzer.stop()
+
+    print(f"samples: {args.samples}  devices: {len(analyzer.devices.devices)}  format: {args.format}  "
+          f"batch: {args.batch_size}  senders: {args.senders}")
+    print(f"bytes: {server.stats['bytes']}  errors: {server.stats['errors']}  ml_enabled: {analyzer.is_model_trained}")
+    print(f"elapsed: {elapsed:.3f}s  throughput: {args.samples / elapsed:,.0f} samples/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200000)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--format", choices=["ndjson", "msgpack"], default="ndjson")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--senders", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5098)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Check incremental insights against the original batch computation and time both.
+
+The original AIAnalyzer._generate_insights recomputes everything from the
+full frame on each call; InsightsAggregator folds rows in as they arrive
+(here in --chunk sized pieces) and reads the result in O(devices):
+
+    python benchmarks/insights.py --rows 1000000 --chunk 10000
+"""
+import argparse
+
+from common import timed
+
+from src.data_handlers.sample_data import generate_sample_data
+from src.data_pipeline import DataPipeline
+from src.aggregates import InsightsAggregator
+from src.serialization import format_timestamp
+
+COLUMNS = ["temperature", "humidity", "pressure"]
+
+
+def legacy_insights(data):
+    """The original AIAnalyzer._generate_insights"""
+    device_summary = []
+    status_counts = data.groupby('device_id', observed=True)['status'].value_counts()
+    for (device, status), count in status_counts[status_counts > 0].items():
+        device_summary.append({"device_id": device, "status": status, "count": count})
+    return {
+        "total_records": len(data),
+        "time_range": {
+            "start": format_timestamp(data['timestamp'].min()),
+            "end": format_timestamp(data['timestamp'].max())
+        },
+        "critical_events": (data['status'] == 'critical').sum(),
+        "device_summary": device_summary
+    }
+
+
+def comparable(insights):
+    # Ties between equal counts may be ordered differently, so compare as sorted rows
+    return (
+        int(insights["total_records"]),
+        insights["time_range"]["start"],
+        insights["time_range"]["end"],
+        int(insights["critical_events"]),
+        sorted((str(row["device_id"]), str(row["status"]), int(row["count"])) for row in insights["device_summary"])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk", type=int, default=10000)
+    args = parser.parse_args()
+
+    data = DataPipeline()._clean_data(generate_sample_data(rows=args.rows))
+
+    legacy_time, expected = timed(lambda: legacy_insights(data))
+
+    aggregator = InsightsAggregator(COLUMNS)
+    update_time, _ = timed(lambda: [aggregator.update(data.iloc[i:i + args.chunk])
+                                    for i in range(0, len(data), args.chunk)])
+    read_time, actual = timed(aggregator.result)
+
+    one_shot = InsightsAggregator(COLUMNS).update(data).result()
+    assert comparable(actual) == comparable(expected), "chunked insights differ from the batch output"
+    assert comparable(one_shot) == comparable(expected), "one-shot insights differ from the batch output"
+
+    chunks = -(-len(data) // args.chunk)
+    print(f"rows: {len(data)}  chunks: {chunks}  devices: {len(aggregator.buckets)}  matches batch output: yes")
+    print(f"batch recompute per request: {legacy_time * 1000:.1f} ms")
+    print(f"incremental update per chunk: {update_time / chunks * 1000:.2f} ms  "
+          f"read per request: {read_time * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Scaling benchmark for partitioned pipeline execution across worker counts.
+
+Runs on a seeded sample Parquet file, so each worker reads its own
+partition. The sentiment model is replaced by a constant classifier so the
+run measures load/clean/validate/aggregate work only. Each worker count's
+pool is started and warmed before timing, as the API's long-lived pool is:
+
+    python benchmarks/partitioned.py --rows 1000000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from common import best_of, constant_classifier
+
+from ai_analyzer import AIAnalyzer
+from src.data_handlers.sample_data import write_sample_parquet
+from src.data_pipeline import DataPipeline
+from src.partitioned import run_partitioned, shutdown_pools
+from src.serialization import dumps
+
+
+def comparable(analysis):
+    """The response as parsed JSON, without the live inference counters"""
+    result = json.loads(dumps(analysis))
+    result["classifications"].pop("inference_stats")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--partition-by", choices=["device_id", "rows"], default="device_id")
+    parser.add_argument("--row-group-size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--per-device-anomalies", action="store_true",
+                        help="score anomalies per device, so device partitions must hold whole devices")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="partitioned-bench-")
+    write_sample_parquet(os.path.join(data_dir, "sample.parquet"), args.rows,
+                         chunk_size=args.row_group_size, end="2024-01-01")
+    pipeline = DataPipeline(data_root=data_dir)
+    analyzer = AIAnalyzer(text_classifier=constant_classifier,
+                          anomaly_group_by="device_id" if args.per_device_anomalies else None)
+
+    def serial_run():
+        return analyzer.analyze(pipeline.process("sample.parquet", columns=analyzer.analysis_columns))
+
+    serial, expected = best_of(serial_run, args.repeat)
+    print(f"rows: {args.rows:,}  partition by: {args.partition_by}  "
+          f"per-device anomalies: {args.per_device_anomalies}")
+    print(f"serial        : {serial:7.2f} s")
+
+    try:
+        for workers in args.workers:
+            def partitioned_run():
+                return run_partitioned(pipeline, analyzer, "sample.parquet",
+                                       partition_by=args.partition_by, max_workers=workers)
+
+            partitioned_run()  # starts and warms this worker count's pool
+            elapsed, result = best_of(partitioned_run, args.repeat)
+            assert comparable(result) == comparable(expected), "partitioned results differ from the serial run"
+            print(f"{workers} worker(s)   : {elapsed:7.2f} s   speedup {serial / elapsed:4.2f}x")
+    finally:
+        shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
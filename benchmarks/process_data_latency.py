@@ -0,0 +1,52 @@
+"""/process-data request latency versus row count.
+
+Writes sample data of each size to a temporary Parquet file, then times
+POST /process-data through FastAPI's TestClient with the sentiment model
+replaced by a constant classifier. For comparison it also times the old
+DataFrame -> records -> DataFrame round trip and stdlib JSON encoding:
+
+    python benchmarks/process_data_latency.py --rows 1000 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from common import constant_classifier, timed
+
+from src.data_handlers.sample_data import generate_sample_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    from src import main as api
+    from fastapi.testclient import TestClient
+
+    api.analyzer._text_classifier = constant_classifier
+    client = TestClient(api.app)
+
+    print(f"{'rows':>10s} {'request ms':>12s} {'records round trip ms':>22s} {'stdlib json ms':>15s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        api.pipeline.data_root = os.path.realpath(tmp)
+        for rows in args.rows:
+            path = os.path.join(tmp, f"sample_{rows}.parquet")
+            data = generate_sample_data(rows=rows)
+            data["humidity"] = data["humidity"].clip(0, 100)
+            data.to_parquet(path)
+
+            request_time, response = timed(lambda: client.post("/process-data", params={"data_source": path}))
+            assert response.status_code == 200, response.text
+
+            cleaned = api.pipeline.process(path)
+            round_trip, _ = timed(lambda: pd.DataFrame(cleaned.to_dict(orient="records")))
+            encode, _ = timed(lambda: json.dumps(response.json()))
+            print(f"{rows:>10,d} {request_time * 1000:12.1f} {round_trip * 1000:22.1f} {encode * 1000:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time loading one device over one day out of a year of minute data.
+
+Writes a year-long sample Parquet file (one row group per --row-group
+rows), then compares a full load with a device_id + time-range filtered
+load through DataPipeline:
+
+    python benchmarks/pushdown.py --devices 50 --row-group 10080
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from common import timed
+
+from src.data_handlers.sample_data import write_sample_parquet
+from src.data_pipeline import DataPipeline
+from src.sources import RowFilter
+
+END = pd.Timestamp("2024-01-01")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--row-group", type=int, default=7 * 24 * 60)
+    parser.add_argument("--day", default="2023-06-01")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = DataPipeline(data_root=tmp)
+        path = os.path.join(tmp, "year.parquet")
+        rows = 365 * 24 * 60
+        write_sample_parquet(path, rows, chunk_size=args.row_group, devices=args.devices, end=END)
+
+        full_time, full = timed(lambda: pipeline.process(path))
+        day = pd.Timestamp(args.day)
+        row_filter = RowFilter(["device_1"], day, day + pd.Timedelta(days=1))
+        filtered_time, filtered = timed(lambda: pipeline.process(path, row_filter=row_filter))
+
+        expected = full[(full["device_id"] == "device_1") & (full["timestamp"] >= day)
+                        & (full["timestamp"] < day + pd.Timedelta(days=1))]
+        assert len(filtered) == len(expected), "filtered load differs from filtering the full load"
+
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f"file: {rows:,d} rows, {size:.1f} MB, row group {args.row_group:,d} rows, {args.devices} devices")
+        print(f"full load:     {full_time * 1000:8.1f} ms  {len(full):>9,d} rows")
+        print(f"one device/day:{filtered_time * 1000:8.1f} ms  {len(filtered):>9,d} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Compare generate_sample_data with the vectorized chunked generator.
+
+    python benchmarks/sample_data.py --rows 1000000 10000000 --chunk-size 1000000
+"""
+import argparse
+import os
+import tempfile
+
+from common import timed
+
+from src.data_handlers.sample_data import (
+    generate_sample_data, generate_sample_data_fast, write_sample_parquet
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="skip the original generator above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12s} {'original s':>11s} {'vectorized s':>13s} {'parquet s':>10s} {'file MB':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            legacy = f"{timed(lambda: generate_sample_data(rows=rows))[0]:11.2f}" if rows <= args.legacy_max else f"{'-':>11s}"
+            fast, _ = timed(lambda: generate_sample_data_fast(rows, chunk_size=args.chunk_size))
+            path = os.path.join(tmp, f"sample_{rows}.parquet")
+            write, _ = timed(lambda: write_sample_parquet(path, rows, chunk_size=args.chunk_size))
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f"{rows:>12,d} {legacy} {fast:13.2f} {write:10.2f} {size:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
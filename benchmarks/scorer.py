@@ -0,0 +1,81 @@
+"""Latency of BatchScorer for sequential and concurrent callers.
+
+A caller with nothing to coalesce should pay about the cost of a direct
+decision_function call, not the --max-latency batching window; concurrent
+callers should share batches:
+
+    python benchmarks/scorer.py --calls 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from src.scoring import BatchScorer
+
+
+def percentile_ms(samples, q=50):
+    return float(np.percentile(samples, q)) * 1000
+
+
+async def sequential(scorer, rows):
+    """One caller at a time, as the tick loop scores one sample per tick"""
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        await scorer.score(row)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def concurrent(scorer, rows, concurrency):
+    """`concurrency` callers at once, as many connections scoring in the same tick"""
+    timings = []
+
+    async def call(row):
+        start = time.perf_counter()
+        await scorer.score(row)
+        timings.append(time.perf_counter() - start)
+
+    for start in range(0, len(rows), concurrency):
+        await asyncio.gather(*(call(row) for row in rows[start:start + concurrency]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--max-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    model = IsolationForest(contamination=0.15, random_state=42).fit(rng.uniform(30, 100, (100, 2)))
+    rows = rng.uniform(30, 100, (args.calls, 2)).tolist()
+
+    direct = []
+    for row in rows:
+        start = time.perf_counter()
+        model.decision_function([row])
+        direct.append(time.perf_counter() - start)
+
+    scorer = BatchScorer(lambda: model, max_latency=args.max_latency)
+    alone = asyncio.run(sequential(scorer, rows))
+    batches = scorer.stats["batches"]
+    together = asyncio.run(concurrent(scorer, rows, args.concurrency))
+    shared = (scorer.stats["rows"] - len(rows)) / (scorer.stats["batches"] - batches)
+
+    print(f"calls: {args.calls}  window: {args.max_latency * 1000:.0f} ms")
+    print(f"direct decision_function   p50: {percentile_ms(direct):6.2f} ms")
+    print(f"scorer, one caller at once p50: {percentile_ms(alone):6.2f} ms   "
+          f"({batches} batches for {len(rows)} calls)")
+    print(f"scorer, {args.concurrency:3d} concurrent   p50: {percentile_ms(together):6.2f} ms   "
+          f"({shared:.1f} rows per batch)")
+
+
+if __name__ == "__main__":
+    main()
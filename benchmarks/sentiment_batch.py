@@ -0,0 +1,63 @@
+"""Compare per-sample sentiment scoring with DeviceAnalyzer.classify_batch.
+
+Fits the IsolationForest on simulated metrics, then re-scores --samples
+historical samples both ways and checks that the labels agree:
+
+    python benchmarks/sentiment_batch.py --samples 1000000 --scalar-samples 20000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from ai_analyzer import DeviceAnalyzer
+from src.model_store import ModelStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--scalar-samples", type=int, default=20000,
+                        help="per-sample calls are slow, so time a prefix and extrapolate")
+    args = parser.parse_args()
+
+    analyzer = DeviceAnalyzer(model_store=ModelStore(tempfile.mkdtemp(prefix="sentiment-bench-")))
+    rng = np.random.default_rng(42)
+    cpu = rng.uniform(30, 100, args.samples).round(2)
+    mem = rng.uniform(40, 100, args.samples).round(2)
+    analyzer._anomaly_detector = analyzer._fit_model(np.column_stack([cpu[:100], mem[:100]]))
+    analyzer.is_model_trained = True
+
+    start = time.perf_counter()
+    scored = analyzer.classify_batch(cpu, mem)
+    batch_time = time.perf_counter() - start
+
+    n = min(args.scalar_samples, args.samples)
+    detector = analyzer.anomaly_detector
+    start = time.perf_counter()
+    scalar = []
+    for c, m in zip(cpu[:n], mem[:n]):
+        prediction = detector.predict([[c, m]])[0]
+        scalar.append(analyzer._sentiment_from_prediction(prediction, c * 0.7 + m * 0.3))
+    scalar_time = (time.perf_counter() - start) * args.samples / n
+
+    labels = analyzer.sentiment_labels(scored["sentiment"][:n])
+    mismatches = int((labels != np.asarray(scalar)).sum())
+    basic = analyzer.sentiment_labels(analyzer.classify_batch(cpu[:n], mem[:n], use_model=False)["sentiment"])
+    basic_mismatches = sum(
+        label != analyzer.analyze_sentiment_basic({"cpu_usage": c, "memory_usage": m})
+        for label, c, m in zip(basic, cpu[:n], mem[:n])
+    )
+
+    print(f"samples: {args.samples}  checked: {n}  mismatches: ml {mismatches}  basic {basic_mismatches}")
+    print(f"per-sample (extrapolated): {scalar_time:.1f}s  batch: {batch_time:.2f}s  "
+          f"speedup: {scalar_time / batch_time:,.0f}x")
+    counts = np.bincount(scored["sentiment"], minlength=len(analyzer.sentiment_levels))
+    print("distribution: " + "  ".join(f"{level} {count}" for level, count in zip(analyzer.sentiment_levels, counts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure import time and time to the first served request for both entry points.
+
+Each measurement runs in a fresh interpreter so module caches don't leak
+between runs:
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from common import ROOT
+
+FLASK_PROBE = """
+import time, json, sys
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+response = client.get('/')
+served = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": served - start, "status": response.status_code}))
+"""
+
+FASTAPI_PROBE = """
+import time, json, sys
+start = time.perf_counter()
+from src import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    response = client.get('/')
+    served = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": served - start, "status": response.status_code}))
+"""
+
+ENTRY_POINTS = {
+    "flask (app.py)": FLASK_PROBE,
+    "fastapi (src/main.py)": FASTAPI_PROBE,
+}
+
+
+def run_probe(code):
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in ENTRY_POINTS.items():
+        samples = [run_probe(code) for _ in range(args.runs)]
+        results[name] = {
+            "import_ms": statistics.median(s["import"] for s in samples) * 1000,
+            "first_request_ms": statistics.median(s["first_request"] for s in samples) * 1000,
+        }
+        print(f"{name:24s} import {results[name]['import_ms']:8.1f} ms   "
+              f"first request {results[name]['first_request_ms']:8.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Reproducible benchmark suite for the pipeline, analyzer and websocket paths.
+
+Runs offline: the sentiment model is replaced by a constant classifier and
+all model/history files go to a temporary directory. Sample Parquet files
+are generated once with a fixed seed and end time, and reused from
+--data-dir when given. Results are written as
+JSON and optionally compared against a stored baseline; the exit status is 1
+when any metric regresses by more than --tolerance:
+
+    python benchmarks/suite.py --rows 10000 100000 1000000 --output results.json
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+
+Timings only compare on the same machine, so no baseline is committed:
+record one with --save-baseline on the machine that runs the comparison
+(e.g. from the main branch before a change). A --baseline file that does not
+exist skips the comparison with a message instead of failing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from common import constant_classifier, quiet
+
+from src.data_handlers.sample_data import write_sample_parquet
+from src.data_pipeline import DataPipeline
+from ai_analyzer import AIAnalyzer, DeviceAnalyzer
+from src.config import settings
+from src.model_store import ModelStore
+from ws_fanout import TimedDeviceAnalyzer, client
+
+
+def percentiles(samples_ms):
+    p50, p99 = np.percentile(samples_ms, [50, 99])
+    return float(p50), float(p99)
+
+
+def sample_file(rows, data_dir):
+    """Seeded sample Parquet file, generated once per data directory and reused"""
+    path = os.path.join(data_dir, f"sample_{rows}.parquet")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        write_sample_parquet(path, rows, end="2024-01-01")
+    return path
+
+
+def bench_pipeline(rows, repeat, data_dir):
+    """process + analyze on a Parquet file of `rows` sample rows"""
+    path = sample_file(rows, data_dir)
+
+    pipeline = DataPipeline(data_root=data_dir)
+    analyzer = AIAnalyzer(text_classifier=constant_classifier)
+
+    def run():
+        return analyzer.analyze(pipeline.process(path))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    # Measured in a separate pass so tracing overhead doesn't skew the timings
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        f"pipeline.{rows}.seconds": (best, "lower"),
+        f"pipeline.{rows}.rows_per_second": (rows / best, "higher"),
+        f"pipeline.{rows}.peak_mb": (peak / 1024 / 1024, "lower")
+    }
+
+
+def make_device_analyzer(cls, tmp):
+    settings.TIMESERIES_PATH = os.path.join(tmp, "timeseries")
+    with quiet():
+        analyzer = cls(model_store=ModelStore(os.path.join(tmp, "models")))
+        analyzer._warm_start()
+    # Train on a fixed window so every run scores against the same model
+    rng = np.random.default_rng(42)
+    window = np.column_stack([rng.uniform(30, 100, 100), rng.uniform(40, 90, 100)])
+    analyzer.history.extend(window.tolist())
+    with quiet():
+        analyzer._anomaly_detector = analyzer._fit_model(window)
+    analyzer.is_model_trained = True
+    return analyzer
+
+
+def bench_tick(ticks, tmp):
+    """Per-tick sentiment latency, synchronous and through the async tick path"""
+    analyzer = make_device_analyzer(DeviceAnalyzer, tmp)
+    np.random.seed(42)
+    metrics = [analyzer.simulate_device_metrics() for _ in range(ticks)]
+
+    sync_ms = []
+    with quiet():
+        for sample in metrics:
+            start = time.perf_counter()
+            analyzer.analyze_sentiment_with_ml(sample)
+            sync_ms.append((time.perf_counter() - start) * 1000)
+
+    async def run_ticks():
+        samples = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            await analyzer.build_tick()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    with quiet():
+        tick_ms = asyncio.run(run_ticks())
+        analyzer.stop()
+
+    sync_p50, sync_p99 = percentiles(sync_ms)
+    tick_p50, tick_p99 = percentiles(tick_ms)
+    return {
+        "sentiment.sync.p50_ms": (sync_p50, "lower"),
+        "sentiment.sync.p99_ms": (sync_p99, "lower"),
+        "tick.build.p50_ms": (tick_p50, "lower"),
+        "tick.build.p99_ms": (tick_p99, "lower")
+    }
+
+
+async def run_fanout(analyzer, clients, ticks, port):
+    server = asyncio.get_running_loop().create_task(analyzer.serve(port))
+    await asyncio.sleep(0.5)
+    latencies, connected = [], []
+    tasks = [asyncio.create_task(client(port, ticks, latencies, connected)) for _ in range(clients)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    analyzer.running = False
+    analyzer.server.close()
+    await asyncio.wait_for(server, timeout=10)
+    errors = sum(isinstance(result, Exception) for result in results)
+    return np.array(latencies) * 1000, errors
+
+
+def bench_websocket(clients, ticks, interval, port, tmp):
+    """Publish-to-receive latency with `clients` local websocket clients"""
+    analyzer = make_device_analyzer(TimedDeviceAnalyzer, tmp)
+    analyzer.tick_interval = interval
+    with quiet():
+        latencies, errors = asyncio.run(run_fanout(analyzer, clients, ticks, port))
+    if errors or not len(latencies):
+        raise RuntimeError(f"websocket benchmark failed: {errors} client errors, {len(latencies)} frames")
+    p50, p99 = percentiles(latencies)
+    return {
+        f"websocket.{clients}.p50_ms": (p50, "lower"),
+        f"websocket.{clients}.p99_ms": (p99, "lower")
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return (name, baseline, current, change) for metrics that regressed beyond `tolerance`"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = current["value"] / previous["value"] - 1
+        worse = change > tolerance if current["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append((name, previous["value"], current["value"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--ws-ticks", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=5097)
+    parser.add_argument("--data-dir", help="keep generated sample files here between runs (default: temporary)")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["pipeline", "tick", "websocket"])
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="also write results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if "pipeline" not in args.skip:
+            for rows in args.rows:
+                metrics.update(bench_pipeline(rows, args.repeat, args.data_dir or tmp))
+        if "tick" not in args.skip:
+            metrics.update(bench_tick(args.ticks, tmp))
+        if "websocket" not in args.skip:
+            metrics.update(bench_websocket(args.clients, args.ws_ticks, args.interval, args.port, tmp))
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "args": vars(args)
+        },
+        "results": {name: {"value": value, "better": better} for name, (value, better) in metrics.items()}
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text)
+
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; skipping comparison "
+              f"(record one with --save-baseline {args.baseline})", file=sys.stderr)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for name, previous, current, change in regressions:
+            print(f"REGRESSION {name}: {previous:.4g} -> {current:.4g} ({change:+.1%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Tick jitter, lag and delivered per-client rates under simulated tick load.
+
+Each producer tick blocks the loop for --work-ms (standing in for analysis
+and encoding) and, every --stall-every ticks, for --stall-ms more. Clients
+subscribe at the given rates; delivered rates should match them, with
+missed ticks skipped and coalesced rather than queued:
+
+    python benchmarks/tick_scheduler.py --rates 10 1 0.1 --seconds 20 --work-ms 30
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from src.broadcast import Broadcaster
+from src.scheduler import TickScheduler
+
+
+async def run(args):
+    broadcaster = Broadcaster(max_queue=1_000_000)
+    subscribers = [broadcaster.subscribe(None, interval=1.0 / rate) for rate in args.rates]
+    scheduler = TickScheduler(broadcaster.min_interval)
+    lags = []
+
+    start = time.monotonic()
+    while time.monotonic() - start < args.seconds:
+        tick = await scheduler.wait()
+        lags.append(scheduler.stats["lag_seconds"])
+        work = args.work_ms
+        if args.stall_every and scheduler.stats["ticks"] % args.stall_every == 0:
+            work += args.stall_ms
+        busy_until = time.perf_counter() + work / 1000
+        while time.perf_counter() < busy_until:
+            pass
+        broadcaster.publish_due(lambda *key: tick, tick, slack=scheduler.period / 2)
+    elapsed = time.monotonic() - start
+
+    samples = np.array(lags) * 1000
+    p50, p99 = np.percentile(samples, [50, 99])
+    print(f"period: {scheduler.period * 1000:.0f}ms  ticks: {scheduler.stats['ticks']}  "
+          f"skipped: {scheduler.stats['skipped']}  elapsed: {elapsed:.1f}s")
+    print(f"tick lag ms  p50 {p50:.2f}  p99 {p99:.2f}  max {samples.max():.2f}")
+    for rate, subscriber in zip(args.rates, subscribers):
+        sent = np.array(subscriber.queue)
+        gaps = np.diff(sent) * 1000 if len(sent) > 1 else np.array([0.0])
+        print(f"client {rate:>6g} Hz  frames {len(sent):>5d}  delivered {len(sent) / elapsed:7.2f} Hz  "
+              f"gap ms mean {gaps.mean():8.1f} max {gaps.max():8.1f}  coalesced {subscriber.coalesced}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[10, 1, 0.1])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--work-ms", type=float, default=30)
+    parser.add_argument("--stall-every", type=int, default=50)
+    parser.add_argument("--stall-ms", type=float, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Bytes and encode time per tick: JSON dicts versus one batched msgpack frame.
+
+Deflated sizes approximate what permessage-deflate puts on the wire:
+
+    python benchmarks/wire.py --devices 1 100 10000
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from common import best_of
+
+from src.wire import SENTIMENT_NAMES, decode_frame, encode_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 100, 10_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'devices':>8s} {'json B':>10s} {'deflated':>9s} {'json ms':>8s} "
+          f"{'msgpack B':>10s} {'deflated':>9s} {'msgpack ms':>11s}")
+    for devices in args.devices:
+        now = time.time()
+        cpu = rng.uniform(30, 100, devices).round(2)
+        mem = rng.uniform(40, 90, devices).round(2)
+        load = (cpu * 0.7 + mem * 0.3).round(2)
+        codes = rng.integers(0, len(SENTIMENT_NAMES), devices)
+        samples = [(f"device_{i}", now + i * 0.001, cpu[i], mem[i], load[i], codes[i]) for i in range(devices)]
+        dicts = [{
+            "cpu_usage": float(cpu[i]), "memory_usage": float(mem[i]),
+            "timestamp": datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'),
+            "sentiment": SENTIMENT_NAMES[codes[i]], "combined_load": float(load[i]),
+            "ml_enabled": True, "device_id": f"device_{i}"
+        } for i in range(devices)]
+
+        json_time, json_frames = best_of(lambda: [json.dumps(d) for d in dicts])
+        json_bytes = sum(len(frame) for frame in json_frames)
+        json_deflated = sum(len(zlib.compress(frame.encode())) for frame in json_frames)
+        packed_time, packed = best_of(lambda: encode_samples(samples, True))
+        assert len(decode_frame(packed)) == devices
+
+        print(f"{devices:>8,d} {json_bytes:>10,d} {json_deflated:>9,d} {json_time * 1000:8.2f} "
+              f"{len(packed):>10,d} {len(zlib.compress(packed)):>9,d} {packed_time * 1000:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Open many local websocket clients and report broadcast fan-out latency.
+
+The server and the clients share one event loop and clock, so latency is
+measured from the moment a frame is published to the moment each client
+has received it:
+
+    python benchmarks/ws_fanout.py --clients 5000 --ticks 20 --interval 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+import common  # noqa: F401  puts the repository root on sys.path
+
+from ai_analyzer import DeviceAnalyzer
+
+
+class TimedDeviceAnalyzer(DeviceAnalyzer):
+    """Stamps each frame with the publish time on the shared monotonic clock"""
+
+    async def build_tick(self):
+        data = await super().build_tick()
+        data["published_at"] = time.perf_counter()
+        return data
+
+
+async def client(port, ticks, latencies, connected):
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{port}", compression=None,
+                                  open_timeout=60, max_queue=None) as ws:
+        connected.append(1)
+        for _ in range(ticks):
+            frame = json.loads(await ws.recv())
+            latencies.append(time.perf_counter() - frame["published_at"])
+
+
+async def run(args):
+    analyzer = TimedDeviceAnalyzer()
+    analyzer.tick_interval = args.interval
+    server = asyncio.get_running_loop().create_task(analyzer.serve(args.port))
+    await asyncio.sleep(0.5)
+
+    latencies, connected, tasks = [], [], []
+    start = time.perf_counter()
+    for offset in range(0, args.clients, args.connect_batch):
+        batch = [asyncio.create_task(client(args.port, args.ticks, latencies, connected))
+                 for _ in range(min(args.connect_batch, args.clients - offset))]
+        tasks.extend(batch)
+        while len(connected) < offset + len(batch):
+            await asyncio.sleep(0.01)
+    connect_time = time.perf_counter() - start
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+
+    analyzer.running = False
+    analyzer.server.close()
+    await asyncio.wait_for(server, timeout=10)
+
+    samples = np.array(latencies) * 1000
+    print(f"clients: {args.clients}  ticks: {args.ticks}  interval: {args.interval}s")
+    print(f"connect time: {connect_time:.2f}s  errors: {len(errors)}  "
+          f"frames received: {len(samples)}  dropped: {analyzer.broadcaster.stats['dropped']}")
+    if len(samples):
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+        print(f"fan-out latency ms  p50 {p50:.1f}  p90 {p90:.1f}  p99 {p99:.1f}  max {samples.max():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--connect-batch", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.serialization import format_timestamp
+
+
+class RunningStats:
+    """Mergeable count/min/max/mean/variance using Welford's algorithm (Chan et al. for merges)"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values) -> "RunningStats":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        # ddof=1 matches pandas' Series.std
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+
+
+# Window name -> length in seconds for the per-device window stats in insights
+INSIGHT_WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+
+class InsightsAggregator:
+    """
+    The `insights` section of an analysis, maintained incrementally.
+
+    Keeps per-device status counts, critical events and the time range, plus
+    per-device time buckets of `resolution` seconds holding row and critical
+    counts and column sums. `update` is one vectorized groupby over the new
+    rows; buckets older than twice the longest window (relative to the newest
+    timestamp seen) are dropped, so `result` costs O(devices x buckets) however
+    many rows have arrived. Sliding windows end at the newest bucket; tumbling
+    windows are the last completed, epoch-aligned window of each length.
+    """
+
+    def __init__(self, columns: List[str] = (), windows: Optional[Dict[str, float]] = None,
+                 resolution: float = 10.0):
+        self.columns = list(columns)
+        self.windows = dict(windows or INSIGHT_WINDOWS)
+        self.resolution = resolution
+        self.total_records = 0
+        self.critical_events = 0
+        self.time_start: Optional[Any] = None
+        self.time_end: Optional[Any] = None
+        self.device_status_counts: Counter = Counter()
+        self.latest_bucket: Optional[int] = None
+        # device -> {bucket: [rows, critical, column sums..., column non-null counts...]}
+        self.buckets: Dict[Any, Dict[int, np.ndarray]] = {}
+
+    @property
+    def horizon(self) -> int:
+        """Buckets kept behind the newest one: the longest sliding window plus the previous tumbling one"""
+        return int(np.ceil(2 * max(self.windows.values()) / self.resolution))
+
+    def update(self, chunk: pd.DataFrame) -> "InsightsAggregator":
+        if len(chunk) == 0:
+            return self
+        critical = (chunk['status'] == 'critical').to_numpy()
+        self.total_records += len(chunk)
+        self.critical_events += int(critical.sum())
+        self._update_time_range(chunk['timestamp'].min(), chunk['timestamp'].max())
+        self.device_status_counts.update(
+            chunk.groupby(['device_id', 'status'], observed=True).size().to_dict()
+        )
+        self._update_buckets(chunk, critical)
+        return self
+
+    def _update_time_range(self, start, end):
+        if self.time_start is None or start < self.time_start:
+            self.time_start = start
+        if self.time_end is None or end > self.time_end:
+            self.time_end = end
+
+    def _update_buckets(self, chunk: pd.DataFrame, critical: np.ndarray):
+        timestamps = pd.to_datetime(chunk['timestamp']).to_numpy('datetime64[ns]')
+        valid = ~np.isnat(timestamps)
+        if not valid.any():
+            return
+        buckets = timestamps.astype(np.int64) // int(self.resolution * 1e9)
+        latest = int(buckets[valid].max())
+        if self.latest_bucket is None or latest > self.latest_bucket:
+            self.latest_bucket = latest
+
+        # Rows already outside every window only count towards the totals
+        keep = valid & (buckets > self.latest_bucket - self.horizon)
+        if not keep.any():
+            return
+        frame = pd.DataFrame({
+            'device_id': chunk['device_id'].to_numpy()[keep],
+            'bucket': buckets[keep],
+            'critical': critical[keep]
+        })
+        for col in self.columns:
+            frame[col] = chunk[col].to_numpy()[keep]
+
+        grouped = frame.groupby(['device_id', 'bucket'], sort=False)
+        parts = [grouped.size(), grouped['critical'].sum()]
+        if self.columns:
+            parts += [grouped[self.columns].sum(), grouped[self.columns].count()]
+        partial = pd.concat(parts, axis=1)
+        for (device, bucket), values in zip(partial.index, partial.to_numpy(dtype=np.float64)):
+            self._add_bucket(device, int(bucket), values)
+        for device in partial.index.unique(level=0):
+            self._prune(device)
+
+    def _add_bucket(self, device, bucket: int, values: np.ndarray):
+        device_buckets = self.buckets.setdefault(device, {})
+        if bucket in device_buckets:
+            device_buckets[bucket] += values
+        else:
+            device_buckets[bucket] = values.copy()
+
+    def _prune(self, device):
+        cutoff = self.latest_bucket - self.horizon
+        device_buckets = self.buckets[device]
+        for bucket in [bucket for bucket in device_buckets if bucket <= cutoff]:
+            del device_buckets[bucket]
+
+    def merge(self, other: "InsightsAggregator") -> "InsightsAggregator":
+        self.total_records += other.total_records
+        self.critical_events += other.critical_events
+        if other.time_start is not None:
+            self._update_time_range(other.time_start, other.time_end)
+        self.device_status_counts.update(other.device_status_counts)
+        if other.latest_bucket is not None and (self.latest_bucket is None or other.latest_bucket > self.latest_bucket):
+            self.latest_bucket = other.latest_bucket
+        for device, buckets in other.buckets.items():
+            for bucket, values in buckets.items():
+                self._add_bucket(device, bucket, values)
+            self._prune(device)
+        return self
+
+    def window_stats(self) -> Dict[str, Any]:
+        """Per-device count, critical events and column means for each sliding and tumbling window"""
+        stacked = {
+            device: (np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets)), np.vstack(list(buckets.values())))
+            for device, buckets in self.buckets.items() if buckets
+        }
+        stats = {}
+        for name, seconds in self.windows.items():
+            if self.latest_bucket is None:
+                stats[name] = {"sliding": None, "tumbling": None}
+                continue
+            span = max(int(round(seconds / self.resolution)), 1)
+            current = (self.latest_bucket // span) * span
+            stats[name] = {
+                "sliding": self._window(stacked, self.latest_bucket + 1 - span, self.latest_bucket + 1),
+                "tumbling": self._window(stacked, current - span, current)
+            }
+        return stats
+
+    def _window(self, stacked, start: int, end: int) -> Dict[str, Any]:
+        n = len(self.columns)
+        devices = {}
+        for device, (keys, values) in stacked.items():
+            mask = (keys >= start) & (keys < end)
+            if not mask.any():
+                continue
+            totals = values[mask].sum(axis=0)
+            devices[str(device)] = {
+                "count": int(totals[0]),
+                "critical_events": int(totals[1]),
+                "mean": {
+                    col: float(totals[2 + i] / totals[2 + n + i]) if totals[2 + n + i] else None
+                    for i, col in enumerate(self.columns)
+                }
+            }
+        return {
+            "start": format_timestamp(self._bucket_time(start)),
+            "end": format_timestamp(self._bucket_time(end)),
+            "devices": devices
+        }
+
+    def _bucket_time(self, bucket: int) -> pd.Timestamp:
+        return pd.Timestamp(bucket * int(self.resolution * 1e9))
+
+    def result(self) -> Dict[str, Any]:
+        """Build the `insights` section of AIAnalyzer.analyze"""
+        device_summary = [
+            {"device_id": device, "status": status, "count": int(count)}
+            for (device, status), count in sorted(
+                self.device_status_counts.items(), key=lambda item: (item[0][0], -item[1])
+            )
+        ]
+        return {
+            "total_records": self.total_records,
+            "time_range": {
+                "start": format_timestamp(self.time_start),
+                "end": format_timestamp(self.time_end)
+            },
+            "critical_events": self.critical_events,
+            "device_summary": device_summary,
+            "windows": self.window_stats()
+        }
+
+
+class AnalysisAggregate:
+    """
+    Partial analysis results for a stream of chunks or a set of partitions.
+
+    `update` folds in one cleaned chunk and `merge` combines two aggregates, so
+    memory stays proportional to the number of devices and statuses rather
+    than rows. Streamed anomalies are scored against the running mean/std seen
+    before each chunk, so counts can differ slightly from a full-frame pass.
+    """
+
+    def __init__(self, columns: List[str], threshold: float = 3.0, max_values: int = 5):
+        self.columns = list(columns)
+        self.threshold = threshold
+        self.max_values = max_values
+        self.insights = InsightsAggregator(self.columns)
+        self.status_counts: Counter = Counter()
+        self.sentiment_counts: Counter = Counter()
+        self.text_sentiment: List[Dict[str, Any]] = []
+        self.column_stats = {col: RunningStats() for col in self.columns}
+        self.anomalies = {col: {"count": 0, "values": {}} for col in self.columns}
+
+    @property
+    def total_records(self) -> int:
+        return self.insights.total_records
+
+    def update(self, chunk: pd.DataFrame, score_anomalies: bool = True) -> "AnalysisAggregate":
+        if len(chunk) == 0:
+            return self
+        self.insights.update(chunk)
+        status_counts = chunk['status'].value_counts()
+        self.status_counts.update(status_counts[status_counts > 0].to_dict())
+        for col in self.columns:
+            self._update_column(col, chunk[col], score_anomalies)
+        return self
+
+    def add_sentiments(self, labels: pd.Series, scores: pd.Series):
+        """Count per-row sentiment labels and keep the first few for the response"""
+        sentiment_counts = labels.value_counts()
+        self.sentiment_counts.update(sentiment_counts[sentiment_counts > 0].to_dict())
+        missing = 5 - len(self.text_sentiment)
+        if missing > 0:
+            self.text_sentiment.extend(
+                {"label": label, "score": float(score)}
+                for label, score in zip(labels.head(missing), scores.head(missing))
+            )
+
+    def _update_column(self, col: str, series: pd.Series, score_anomalies: bool = True):
+        stats = self.column_stats[col]
+        chunk_stats = RunningStats().update(series.to_numpy())
+        # Score against what has been seen so far; the first chunk scores against itself
+        reference = stats if stats.count > 1 else chunk_stats
+        if score_anomalies and reference.count > 1:
+            z_scores = np.abs((series.to_numpy(dtype=np.float64) - reference.mean) / reference.std)
+            flagged = np.flatnonzero(z_scores > self.threshold)
+            head = flagged[:self.max_values]
+            self._add_anomalies(col, len(flagged), zip(series.index[head], series.to_numpy()[head]))
+        stats.merge(chunk_stats)
+
+    def set_anomalies(self, anomalies: Dict[str, Any]):
+        """Replace the streamed estimates with exact results computed elsewhere"""
+        for col in self.columns:
+            self.anomalies[col] = {"count": 0, "values": {}}
+            self._add_anomalies(col, anomalies[col]["count"], anomalies[col]["values"].items())
+
+    def _add_anomalies(self, col: str, count: int, items):
+        entry = self.anomalies[col]
+        entry["count"] += int(count)
+        for k, v in items:
+            if len(entry["values"]) >= self.max_values:
+                break
+            entry["values"][str(k)] = v
+
+    def merge(self, other: "AnalysisAggregate") -> "AnalysisAggregate":
+        self.insights.merge(other.insights)
+        self.status_counts.update(other.status_counts)
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.text_sentiment.extend(other.text_sentiment[:max(0, 5 - len(self.text_sentiment))])
+        for col in self.columns:
+            self.column_stats[col].merge(other.column_stats[col])
+            self._add_anomalies(col, other.anomalies[col]["count"], other.anomalies[col]["values"].items())
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        """Build the same response shape as AIAnalyzer.analyze"""
+        return {
+            "classifications": {
+                "text_sentiment": self.text_sentiment,
+                "sentiment_distribution": dict(self.sentiment_counts.most_common()),
+                "status_distribution": dict(self.status_counts.most_common())
+            },
+            "anomalies": {col: self.anomalies[col] for col in self.columns},
+            "insights": self.insights.result()
+        }
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+# Scales the median absolute deviation to match the standard deviation of normal data
+MAD_SCALE = 1.4826
+
+
+def zscore_anomalies(
+    data: pd.DataFrame,
+    columns: List[str],
+    group_by: Optional[str] = None,
+    robust: bool = False,
+    threshold: float = 3.0,
+    max_values: int = 5
+) -> Dict[str, Any]:
+    """
+    Flag values whose z-score exceeds `threshold` in every column at once.
+
+    The columns are copied once into a contiguous (columns, rows) float array
+    and centred/scaled in a single 2-D pass, reusing one scratch buffer for the
+    deviations. With `group_by` the statistics are computed per group (e.g. per
+    device); with `robust` the median and MAD replace the mean and standard
+    deviation. Reported values come from the original columns, so float32
+    data keeps its float32 values instead of widened float64 ones.
+    """
+    values = np.ascontiguousarray(data[columns].to_numpy(dtype=np.float64).T)
+    if values.shape[1] == 0:
+        return {column: {"count": 0, "values": {}} for column in columns}
+
+    if group_by is None:
+        center, scale = _column_stats(values, robust)
+        center, scale = center[:, None], scale[:, None]
+    else:
+        codes, uniques = pd.factorize(data[group_by], sort=False)
+        center, scale = _grouped_stats(values, codes, len(uniques), robust)
+        center, scale = center[:, codes], scale[:, codes]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = np.subtract(values, center)
+        np.abs(z_scores, out=z_scores)
+        z_scores /= scale
+    mask = z_scores > threshold
+
+    counts = mask.sum(axis=1)
+    anomalies = {}
+    for j, column in enumerate(columns):
+        rows = np.flatnonzero(mask[j])[:max_values]
+        anomalies[column] = {
+            "count": counts[j],
+            "values": dict(zip(data.index[rows], data[column].to_numpy()[rows]))
+        }
+    return anomalies
+
+
+def _column_stats(values: np.ndarray, robust: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-column centre and scale of a (columns, rows) array"""
+    n = values.shape[1]
+    if robust:
+        center = np.median(values, axis=1)
+        deviations = np.abs(values - center[:, None])
+        return center, np.median(deviations, axis=1) * MAD_SCALE
+
+    center = values.mean(axis=1)
+    deviations = values - center[:, None]
+    # ddof=1 matches pandas' Series.std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.sqrt(np.einsum('ij,ij->i', deviations, deviations) / (n - 1))
+    return center, scale
+
+
+def _grouped_stats(values: np.ndarray, codes: np.ndarray, n_groups: int,
+                   robust: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group centre and scale, shaped (columns, groups)"""
+    if robust:
+        # Medians need each group's values together, so sort once by group code
+        center = np.full((values.shape[0], n_groups), np.nan)
+        scale = np.full((values.shape[0], n_groups), np.nan)
+        order = np.argsort(codes, kind='stable')
+        sorted_values = values[:, order]
+        bounds = np.r_[0, np.cumsum(np.bincount(codes, minlength=n_groups))]
+        for group in range(n_groups):
+            center[:, group], scale[:, group] = _column_stats(
+                sorted_values[:, bounds[group]:bounds[group + 1]], robust=True
+            )
+        return center, scale
+
+    counts = np.bincount(codes, minlength=n_groups)
+    center = np.vstack([np.bincount(codes, weights=row, minlength=n_groups) for row in values]) / counts
+    deviations = values - center[:, codes]
+    deviations *= deviations
+    squares = np.vstack([np.bincount(codes, weights=row, minlength=n_groups) for row in deviations])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.sqrt(squares / (counts - 1))
+    return center, scale
@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from typing import Any, Callable, Optional, Set
+
+from src.metrics import WS_SEND_SECONDS
+
+
+class Subscriber:
+    """
+    A connected client with a bounded send queue that drops its oldest frame when full.
+
+    Each subscriber has its own tick `interval` and optional focused `device`;
+    the producer ticks at the fastest interval and `due` decides which of its
+    ticks this client gets.
+    """
+
+    def __init__(self, websocket: Any, max_queue: int, fmt: str = "json",
+                 interval: float = 2.0, device: Optional[str] = None):
+        self.websocket = websocket
+        self.format = fmt
+        self.interval = interval
+        self.device = device
+        self.next_due = None
+        self.queue = deque(maxlen=max_queue)
+        self.dropped = 0
+        self.coalesced = 0
+        self._ready = asyncio.Event()
+
+    @property
+    def key(self):
+        """Subscribers with equal keys receive identical frames"""
+        return self.format, self.device, self.interval
+
+    def due(self, now: float, slack: float = 0.0) -> bool:
+        """
+        Whether a producer tick at monotonic `now` is one of this client's ticks.
+
+        Deadlines advance by exactly `interval`, so the client's rate doesn't
+        drift; `slack` (half the producer period) absorbs wake-up jitter. If
+        the producer fell a whole interval behind, the missed frames are
+        coalesced into this one rather than sent back to back.
+        """
+        if self.next_due is None:
+            self.next_due = now
+        if now + slack < self.next_due:
+            return False
+        self.next_due += self.interval
+        if self.next_due <= now:
+            missed = int((now - self.next_due) // self.interval) + 1
+            self.coalesced += missed
+            self.next_due += missed * self.interval
+        return True
+
+    def offer(self, frame):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(frame)
+        self._ready.set()
+
+    async def next_frame(self):
+        while not self.queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.queue.popleft()
+
+
+class Broadcaster:
+    """Fan pre-serialized frames out to every subscriber without waiting on slow ones"""
+
+    def __init__(self, max_queue: int = 8):
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscriber] = set()
+        self.stats = {"published": 0, "dropped": 0, "coalesced": 0}
+
+    @property
+    def min_interval(self) -> Optional[float]:
+        """The fastest subscriber interval, i.e. the rate the producer must tick at"""
+        return min((subscriber.interval for subscriber in self.subscribers), default=None)
+
+    def subscribe(self, websocket, fmt: str = "json", interval: float = 2.0,
+                  device: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(websocket, self.max_queue, fmt, interval, device)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        self.stats["dropped"] += subscriber.dropped
+        self.stats["coalesced"] += subscriber.coalesced
+
+    def publish_due(self, encode: Callable[[str, Optional[str], float], Any], now: float, slack: float = 0.0):
+        """
+        Queue a frame for every subscriber due at monotonic `now`; never blocks.
+
+        `encode(format, device, interval)` runs once per distinct subscriber
+        key, so clients sharing a format, focus and rate share one frame; a
+        None frame means there is nothing to send that key this tick.
+        """
+        frames = {}
+        for subscriber in list(self.subscribers):
+            if not subscriber.due(now, slack):
+                continue
+            key = subscriber.key
+            if key not in frames:
+                frames[key] = encode(*key)
+            if frames[key] is not None:
+                subscriber.offer(frames[key])
+        if any(frame is not None for frame in frames.values()):
+            self.stats["published"] += 1
+
+    async def pump(self, subscriber: Subscriber):
+        """Send queued frames to one subscriber until its connection closes"""
+        sender = asyncio.ensure_future(self._send_loop(subscriber))
+        closed = asyncio.ensure_future(subscriber.websocket.wait_closed())
+        try:
+            await asyncio.wait({sender, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sender.cancel()
+            closed.cancel()
+        if sender.done() and not sender.cancelled():
+            sender.result()
+
+    async def _send_loop(self, subscriber: Subscriber):
+        while True:
+            frame = await subscriber.next_frame()
+            with WS_SEND_SECONDS.time():
+                await subscriber.websocket.send(frame)
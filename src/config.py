@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # API configurations
@@ -7,10 +8,68 @@ class Settings(BaseSettings):
     
     # AI Model configurations
     MODEL_PATH: str = "models/"
+    MODEL_WINDOW_SIZE: int = 100
+    MODEL_MIN_SAMPLES: int = 20
+    MODEL_REFIT_INTERVAL: int = 50
+    # Minimum seconds between refits, on top of the sample count
+    MODEL_REFIT_MIN_SECONDS: float = 60.0
+    
+    # Sentiment inference configurations
+    INFERENCE_CACHE_SIZE: int = 10000
+    WARMUP_MODELS: bool = False
     
     # Data pipeline configurations
     BATCH_SIZE: int = 1000
     MAX_WORKERS: int = 4
+    # File sources must resolve inside this directory
+    DATA_ROOT: str = "data/"
+    
+    # Anomaly detection configurations
+    ANOMALY_COLUMNS: List[str] = ["temperature", "humidity", "pressure"]
+    ANOMALY_GROUP_BY: Optional[str] = None
+    ANOMALY_ROBUST: bool = False
+    ANOMALY_THRESHOLD: float = 3.0
+    
+    # Job execution configurations
+    JOB_MAX_CONCURRENCY: int = 4
+    JOB_MAX_QUEUE: int = 64
+    JOB_RETENTION: int = 1000
+    
+    # Result cache configurations
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 32
+    RESULT_CACHE_TTL: float = 300.0
+    RESULT_CACHE_DIR: Optional[str] = None
+    RESULT_CACHE_MAX_DISK_MB: int = 256
+    RESULT_CACHE_HASH_CONTENT: bool = False
+    
+    # Live scoring configurations
+    SCORING_MAX_LATENCY_MS: float = 10.0
+    SCORING_MAX_BATCH_SIZE: int = 256
+    
+    # Websocket streaming configurations
+    TICK_INTERVAL: float = 2.0
+    # Fastest per-client rate a websocket client may request (?rate=/?interval=)
+    TICK_MIN_INTERVAL: float = 0.05
+    WS_SEND_QUEUE_SIZE: int = 8
+    # permessage-deflate; costs CPU per frame per client, so off unless bandwidth matters more
+    WS_COMPRESSION: bool = False
+    
+    # Device ingestion configurations
+    INGEST_ENABLED: bool = False
+    INGEST_PORT: int = 5003
+    # Longest NDJSON line accepted; a connection that exceeds it is closed
+    INGEST_MAX_LINE_BYTES: int = 1024 * 1024
+    SIMULATE_METRICS: bool = True
+    
+    # Metric history configurations
+    TIMESERIES_PATH: str = "data/timeseries/"
+    TIMESERIES_RING_ROWS: int = 3600
+    TIMESERIES_SEGMENT_ROWS: int = 86400
+    
+    # Metrics and logging configurations
+    # Log one in this many websocket ticks
+    TICK_LOG_EVERY: int = 100
     
     class Config:
         env_file = ".env"
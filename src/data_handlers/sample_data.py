@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+STATUSES = ['normal', 'warning', 'critical']
+NOTE_CATEGORIES = [f"Measurement from sensor {i}" for i in range(1, 6)]
 
 def generate_sample_data(rows=1000):
     """Generate synthetic data for demonstration"""
@@ -20,4 +24,96 @@ def generate_sample_data(rows=1000):
         'notes': [f"Measurement from sensor {i % 5 + 1}" for i in range(rows)]
     }
     
-    return pd.DataFrame(data) 
\ No newline at end of file
+    return pd.DataFrame(data) 
+
+def _generate_chunk(rng: np.random.Generator, offset: int, rows: int, end: pd.Timestamp,
+                    freq: pd.Timedelta, device_ids: pd.Index, anomaly_rate: float,
+                    label_anomalies: bool) -> pd.DataFrame:
+    # Newest first, like generate_sample_data: row i is `end - i * freq`
+    timestamps = pd.date_range(end=end - offset * freq, periods=rows, freq=freq)[::-1]
+    temperature = rng.normal(25, 5, rows)
+    humidity = rng.normal(60, 10, rows)
+    pressure = rng.normal(1013, 10, rows)
+    status = rng.integers(0, len(STATUSES), rows, dtype=np.int8)
+
+    anomalous = rng.random(rows) < anomaly_rate if anomaly_rate > 0 else np.zeros(rows, dtype=bool)
+    count = int(anomalous.sum())
+    if count:
+        # 4-5 standard deviations away in a random direction, reported as critical
+        signs = rng.choice([-1.0, 1.0], (3, count))
+        spikes = rng.uniform(4, 5, (3, count)) * signs
+        temperature[anomalous] = 25 + spikes[0] * 5
+        humidity[anomalous] = 60 + spikes[1] * 10
+        pressure[anomalous] = 1013 + spikes[2] * 10
+        status[anomalous] = STATUSES.index('critical')
+
+    data = pd.DataFrame({
+        'timestamp': timestamps,
+        # Clipped to the ranges DataPipeline._validate_data accepts
+        'temperature': np.clip(temperature, -50, 50),
+        'humidity': np.clip(humidity, 0, 100),
+        'pressure': pressure,
+        'status': pd.Categorical.from_codes(status, categories=STATUSES),
+        'device_id': pd.Categorical.from_codes(
+            rng.integers(0, len(device_ids), rows, dtype=np.int32), categories=device_ids
+        ),
+        'notes': pd.Categorical.from_codes(
+            (np.arange(offset, offset + rows) % len(NOTE_CATEGORIES)).astype(np.int8), categories=NOTE_CATEGORIES
+        )
+    })
+    if label_anomalies:
+        data['is_anomaly'] = anomalous
+    return data
+
+def iter_sample_data(rows: int = 1000, chunk_size: int = 1_000_000, devices: int = 5,
+                     anomaly_rate: float = 0.0, seed: int = 42, end: Optional[datetime] = None,
+                     freq: str = '1min', label_anomalies: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Generate sample data column-wise in chunks of `chunk_size` rows.
+
+    Same schema and distributions as `generate_sample_data`, but every chunk
+    draws from its own `numpy.random.Generator` spawned from `seed`, so output
+    is reproducible for a given chunk size, independent of global NumPy state
+    and safe to generate from several threads. status, device_id and notes are
+    categoricals; `anomaly_rate` of the rows get 4-5 sigma sensor spikes and
+    critical status. `rows=0` yields one empty chunk, so callers still get
+    the schema.
+    """
+    end = pd.Timestamp(end or datetime.now())
+    step = pd.Timedelta(freq)
+    device_ids = pd.Index([f"device_{i}" for i in range(1, devices + 1)])
+    n_chunks = max(1, -(-rows // chunk_size))
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    for index, stream in enumerate(streams):
+        offset = index * chunk_size
+        yield _generate_chunk(
+            np.random.default_rng(stream), offset, max(0, min(chunk_size, rows - offset)),
+            end, step, device_ids, anomaly_rate, label_anomalies
+        )
+
+def generate_sample_data_fast(rows: int = 1000, **kwargs) -> pd.DataFrame:
+    """All of `iter_sample_data` as one DataFrame"""
+    chunks = list(iter_sample_data(rows, **kwargs))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+def write_sample_parquet(path: str, rows: int, chunk_size: int = 1_000_000, **kwargs) -> str:
+    """
+    Stream `iter_sample_data` into a Parquet file, one row group per chunk,
+    without holding more than one chunk in memory.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in iter_sample_data(rows, chunk_size=chunk_size, **kwargs):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
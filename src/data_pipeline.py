@@ -1,25 +1,72 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Union
+import hashlib
 import logging
+import os
+import threading
 import time
-from data_handlers.sample_data import generate_sample_data
+from src.config import settings
+from src.data_handlers.sample_data import generate_sample_data
+from src.result_cache import ResultCache
+from src.sources import RowFilter, open_dataset, source_files
+from src.metrics import PIPELINE_RUNS, PIPELINE_STAGE_SECONDS, timed
+
+SENSOR_COLUMNS = ['temperature', 'humidity', 'pressure']
+CATEGORICAL_COLUMNS = ['status', 'device_id']
+
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc"
+}
+
+# Columns the analyzer reads; file sources load only these
+BASE_COLUMNS = ['timestamp', 'device_id', 'status', 'notes']
 
 class DataPipeline:
-    def __init__(self):
+    def __init__(self, lean: bool = True, data_root: Optional[str] = None):
+        # lean=True keeps compact dtypes and native timestamps; False restores string timestamps
+        self.lean = lean
+        self.data_root = os.path.realpath(data_root or settings.DATA_ROOT)
         self.logger = logging.getLogger(__name__)
         self.metrics = {
             "processed_records": 0,
             "processing_time": 0,
             "error_rate": 0
         }
+        self._runs = 0
+        self._errors = 0
+        # Jobs run pipelines concurrently from worker threads
+        self._lock = threading.Lock()
+        self.result_cache = ResultCache(
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+            ttl=settings.RESULT_CACHE_TTL,
+            disk_path=settings.RESULT_CACHE_DIR,
+            max_disk_bytes=settings.RESULT_CACHE_MAX_DISK_MB * 1024 * 1024
+        ) if settings.RESULT_CACHE_ENABLED else None
     
-    def process(self, data_source: str) -> pd.DataFrame:
+    def process(self, data_source: str, stream: bool = False, row_filter: Optional[RowFilter] = None,
+                columns: Optional[Sequence[str]] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
-        Main pipeline processing function
+        Main pipeline processing function.
+
+        With stream=True a generator of cleaned, validated chunks of
+        settings.BATCH_SIZE rows is returned instead of a single DataFrame.
+        `row_filter` restricts the rows loaded (pushed down for file sources).
+        `columns` are the analyzer's extra columns (AIAnalyzer.analysis_columns)
+        to keep when projecting file sources; settings' anomaly columns otherwise.
         """
+        if stream:
+            return self._process_stream(data_source, row_filter, columns)
+
+        start = time.perf_counter()
         try:
             # Load data
-            data = self._load_data(data_source)
+            data = self._load_data(data_source, row_filter, columns)
             
             # Clean and transform
             cleaned_data = self._clean_data(data)
@@ -28,29 +75,181 @@ class DataPipeline:
             self._validate_data(cleaned_data)
             
             # Update metrics
-            self.metrics["processed_records"] = len(cleaned_data)
+            self._record_run(time.perf_counter() - start, len(cleaned_data))
             
             return cleaned_data
             
         except Exception as e:
+            self._record_run(time.perf_counter() - start, 0, failed=True)
             self.logger.error(f"Pipeline error: {str(e)}")
             raise
     
+    def _process_stream(self, data_source: str, row_filter: Optional[RowFilter] = None,
+                        columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """Clean and validate the source chunk by chunk"""
+        # Time spent consuming the chunks downstream is not pipeline time
+        elapsed = 0.0
+        records = 0
+        try:
+            for chunk in self._iter_chunks(data_source, settings.BATCH_SIZE, row_filter, columns):
+                start = time.perf_counter()
+                cleaned_chunk = self._clean_data(chunk)
+                self._validate_data(cleaned_chunk)
+                records += len(cleaned_chunk)
+                elapsed += time.perf_counter() - start
+                yield cleaned_chunk
+        except Exception as e:
+            self._record_run(elapsed, records, failed=True)
+            self.logger.error(f"Pipeline error: {str(e)}")
+            raise
+        self._record_run(elapsed, records)
+
+    def _record_run(self, elapsed: float, records: int, failed: bool = False):
+        """Fill processed_records and processing_time (seconds) of the last run, and error_rate (failed runs / runs)"""
+        with self._lock:
+            self._runs += 1
+            self._errors += int(failed)
+            self.metrics["processed_records"] = records
+            self.metrics["processing_time"] = elapsed
+            self.metrics["error_rate"] = self._errors / self._runs
+        PIPELINE_RUNS.labels(result="error" if failed else "ok").inc()
+    
     def get_metrics(self) -> Dict[str, Any]:
-        return self.metrics
+        with self._lock:
+            metrics = dict(self.metrics)
+        if self.result_cache is None:
+            return metrics
+        return {**metrics, **self.result_cache.get_metrics()}
+
+    def fingerprint(self, source: str) -> Optional[str]:
+        """Cheap identity of a source's content, used to key cached results; None if uncacheable"""
+        if source == "sample":
+            # generate_sample_data stamps rows with datetime.now(), so every run differs
+            return None
+
+        source = self.resolve_source(source)
+        files = source_files(source)
+        stats = [os.stat(path) for path in files]
+        size = sum(stat.st_size for stat in stats)
+        if not settings.RESULT_CACHE_HASH_CONTENT:
+            return f"{size}:{max((stat.st_mtime_ns for stat in stats), default=0)}:{len(files)}"
+
+        digest = hashlib.blake2b(digest_size=16)
+        for path in files:
+            digest.update(os.path.relpath(path, source).encode("utf-8"))
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        return f"{size}:{digest.hexdigest()}"
+
+    def cache_key(self, source: str, *options) -> Optional[str]:
+        """Key for a source's analysis under `options`, or None if the result mustn't be cached"""
+        fingerprint = self.fingerprint(source)
+        if fingerprint is None:
+            return None
+        return ResultCache.make_key(source, fingerprint, *options)
+
+    def resolve_source(self, source: str) -> str:
+        """
+        The real path of a file source, or raise ValueError.
+
+        Sources come from request parameters, so relative paths are taken
+        from `data_root` and anything resolving outside it (via "..",
+        absolute paths or symlinks) is rejected before it is opened.
+        """
+        if source == "sample":
+            return source
+        path = os.path.realpath(os.path.join(self.data_root, source))
+        if os.path.commonpath([self.data_root, path]) != self.data_root:
+            raise ValueError(f"Data source outside the data root: {source}")
+        try:
+            self._file_format(path)
+        except ValueError:
+            # Report the name the client sent, not the server-side path
+            raise ValueError(f"Unsupported data source: {source}") from None
+        return path
+
+    def _file_format(self, source: str) -> str:
+        """Return the file format of a source path, or raise for unsupported sources"""
+        if os.path.isdir(source):
+            # A directory is a (possibly hive-partitioned) Parquet dataset
+            return "parquet"
+        file_format = FILE_FORMATS.get(os.path.splitext(source)[1].lower())
+        if file_format is None or not os.path.exists(source):
+            raise ValueError(f"Unsupported data source: {source}")
+        return file_format
     
-    def _load_data(self, source: str) -> pd.DataFrame:
+    def projected_columns(self, available: List[str], columns: Optional[Sequence[str]] = None) -> List[str]:
+        """The analysis columns present in a source, in source order"""
+        if columns is None:
+            columns = settings.ANOMALY_COLUMNS + ([settings.ANOMALY_GROUP_BY] if settings.ANOMALY_GROUP_BY else [])
+        wanted = set(BASE_COLUMNS + SENSOR_COLUMNS + list(columns))
+        return [col for col in available if col in wanted]
+
+    @timed(PIPELINE_STAGE_SECONDS.labels(stage="load"))
+    def _load_data(self, source: str, row_filter: Optional[RowFilter] = None,
+                   columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
         """Load data from various sources"""
         if source == "sample":
             data = generate_sample_data()
             # Convert DataFrame to dict for JSON serialization
-            return data
+            return row_filter.apply(data) if row_filter else data
+
+        source = self.resolve_source(source)
+        file_format = self._file_format(source)
+        if file_format == "csv":
+            data = pd.read_csv(source, usecols=lambda col: col in self.projected_columns([col], columns))
+            return row_filter.apply(data) if row_filter else data
+
+        # Only the projected columns of the row groups matching the filter are read
+        dataset = open_dataset(source, file_format)
+        expression, residual = row_filter.expression(dataset.schema) if row_filter else (None, False)
+        table = dataset.to_table(columns=self.projected_columns(dataset.schema.names, columns), filter=expression)
+        data = table.to_pandas()
+        return row_filter.apply(data) if residual else data
+
+    def _iter_chunks(self, source: str, chunk_size: int, row_filter: Optional[RowFilter] = None,
+                     columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield the source in chunks without materializing it in full"""
+        if source == "sample":
+            data = generate_sample_data()
+            if row_filter:
+                data = row_filter.apply(data)
+            for start in range(0, len(data), chunk_size):
+                yield data.iloc[start:start + chunk_size].copy()
+            return
+
+        source = self.resolve_source(source)
+        file_format = self._file_format(source)
+        if file_format == "csv":
+            for chunk in pd.read_csv(source, chunksize=chunk_size,
+                                     usecols=lambda col: col in self.projected_columns([col], columns)):
+                chunk = row_filter.apply(chunk) if row_filter else chunk
+                if len(chunk):
+                    yield chunk
         else:
-            # You can add more data source handlers here
-            raise ValueError(f"Unsupported data source: {source}")
+            dataset = open_dataset(source, file_format)
+            expression, residual = row_filter.expression(dataset.schema) if row_filter else (None, False)
+            batches = dataset.to_batches(
+                columns=self.projected_columns(dataset.schema.names, columns), filter=expression,
+                batch_size=chunk_size
+            )
+            # Number rows across batches, as the one-shot load does, so row keys stay unique
+            offset = 0
+            for batch in batches:
+                chunk = batch.to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                chunk = row_filter.apply(chunk) if residual else chunk
+                if len(chunk):
+                    yield chunk
     
+    @timed(PIPELINE_STAGE_SECONDS.labels(stage="clean"))
     def _clean_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Clean and preprocess the data"""
+        if self.lean:
+            return self._clean_data_lean(data)
+
         # Remove any rows with missing values
         cleaned = data.dropna()
         
@@ -65,7 +264,37 @@ class DataPipeline:
         cleaned['timestamp'] = cleaned['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
         
         return cleaned
+
+    def _clean_data_lean(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Build the cleaned frame column by column in compact dtypes.
+
+        Rows are only copied when some actually contain missing values, and
+        every output column is produced by a single conversion: categorical
+        status/device_id, float32 sensors and datetime64 timestamps (formatted
+        at the serialization boundary, not here).
+        """
+        valid = data.notna().all(axis=1)
+        source = data if valid.all() else data[valid]
+
+        columns = {}
+        for col in source.columns:
+            if col == 'timestamp':
+                columns[col] = pd.to_datetime(source[col])
+            elif col in SENSOR_COLUMNS:
+                columns[col] = source[col].astype(np.float32)
+            elif col in CATEGORICAL_COLUMNS:
+                columns[col] = source[col].astype('category')
+            else:
+                columns[col] = source[col]
+
+        # Add some derived features
+        columns['hour'] = columns['timestamp'].dt.hour.astype(np.int8)
+        columns['is_warning'] = columns['status'].isin(['warning', 'critical'])
+
+        return pd.DataFrame(columns, copy=False)
     
+    @timed(PIPELINE_STAGE_SECONDS.labels(stage="validate"))
     def _validate_data(self, data: pd.DataFrame) -> bool:
         """Validate the processed data"""
         required_columns = ['timestamp', 'temperature', 'humidity', 'status']
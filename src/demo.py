@@ -38,6 +38,6 @@ if __name__ == "__main__":
     choice = input("Enter your choice (1 or 2): ")
     
     if choice == "1":
-        uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+        uvicorn.run("src.main:app", host="127.0.0.1", port=8000, reload=True)
     elif choice == "2":
         run_demo() 
\ No newline at end of file
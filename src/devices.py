@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.timeseries import RECORD_DTYPE, SENTIMENT_CODES, TimeSeriesStore
+
+# Code order matches SENTIMENT_NAMES and DeviceAnalyzer.sentiment_levels
+NORMAL, STRESSED, FATIGUED, CRITICAL = (SENTIMENT_CODES[name] for name in ('Normal', 'Stressed', 'Fatigued', 'Critical'))
+
+
+def combined_load(cpu, mem) -> np.ndarray:
+    return np.asarray(cpu, dtype=np.float64) * 0.7 + np.asarray(mem, dtype=np.float64) * 0.3
+
+
+def sentiment_codes(load: np.ndarray, predictions: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    DeviceAnalyzer sentiment rules as int8 codes, for the whole batch at once.
+
+    Without `predictions` these are the rule-based levels; with
+    IsolationForest predictions (-1 = anomaly) the model-based ones. The
+    per-sample analyzer methods call this too, so the rules live only here.
+    """
+    if predictions is None:
+        return np.select(
+            [load > 85, load > 70, load > 50], [CRITICAL, STRESSED, FATIGUED], NORMAL
+        ).astype(np.int8)
+    anomalous = np.asarray(predictions) == -1
+    return np.select(
+        [anomalous & (load > 85), anomalous, load > 70], [CRITICAL, STRESSED, FATIGUED], NORMAL
+    ).astype(np.int8)
+
+
+def to_epoch(values) -> np.ndarray:
+    """
+    Epoch seconds from numbers, numeric or datetime strings and missing or
+    unparseable values (now), freely mixed within one batch.
+
+    Datetime strings without an offset are taken as UTC.
+    """
+    try:
+        timestamps = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        items = pd.Series(list(values), dtype=object)
+        timestamps = pd.to_numeric(items, errors='coerce').to_numpy(np.float64)
+        text = np.isnan(timestamps) & items.map(lambda value: isinstance(value, str)).to_numpy(bool)
+        if text.any():
+            parsed = pd.to_datetime(items[text], errors='coerce', utc=True, format='mixed')
+            timestamps[text] = (parsed - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+    return np.where(np.isnan(timestamps), time.time(), timestamps)
+
+
+class DeviceState:
+    """Live state for one device: sample count, last sample and sentiment counts"""
+
+    __slots__ = ("device_id", "samples", "last", "sentiment_counts", "updated_at")
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.samples = 0
+        self.last = None
+        self.sentiment_counts = np.zeros(len(SENTIMENT_CODES), dtype=np.int64)
+        self.updated_at = 0.0
+
+    def update(self, records: np.ndarray):
+        """Fold in a time-ordered block; a late block counts but doesn't replace `last`"""
+        self.samples += len(records)
+        self.sentiment_counts += np.bincount(records['sentiment'], minlength=len(SENTIMENT_CODES))
+        if self.last is None or records[-1]['timestamp'] >= self.last['timestamp']:
+            self.last = records[-1]
+        self.updated_at = time.monotonic()
+
+    def snapshot(self, sentiment_levels: List[str]) -> Dict[str, Any]:
+        last = self.last
+        return {
+            "device_id": self.device_id,
+            "samples": self.samples,
+            "timestamp": float(last['timestamp']),
+            "cpu_usage": round(float(last['cpu']), 2),
+            "memory_usage": round(float(last['mem']), 2),
+            "combined_load": round(float(last['combined_load']), 2),
+            "sentiment": sentiment_levels[last['sentiment']],
+            "sentiment_counts": dict(zip(sentiment_levels, self.sentiment_counts.tolist()))
+        }
+
+
+class DeviceRegistry:
+    """
+    Routes scored sample batches to per-device state and history.
+
+    A batch is sorted once by (device, timestamp); each device's slice then
+    updates its `DeviceState` and is appended to its time series in one
+    call, so the Python-level work is per device per batch, not per sample.
+    """
+
+    def __init__(self, store: TimeSeriesStore):
+        self.store = store
+        self.devices: Dict[str, DeviceState] = {}
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "samples": 0}
+
+    def state(self, device_id: str) -> DeviceState:
+        state = self.devices.get(device_id)
+        if state is None:
+            with self._lock:
+                state = self.devices.setdefault(device_id, DeviceState(device_id))
+        return state
+
+    def route(self, device_ids: np.ndarray, records: np.ndarray):
+        """Apply a batch of RECORD_DTYPE records, aligned with `device_ids`"""
+        if len(records) == 0:
+            return
+        ids, inverse = np.unique(device_ids, return_inverse=True)
+        order = np.lexsort((records['timestamp'], inverse))
+        records, inverse = records[order], inverse[order]
+        bounds = np.flatnonzero(np.r_[True, inverse[1:] != inverse[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            device_id = str(ids[inverse[lo]])
+            chunk = records[lo:hi]
+            self.state(device_id).update(chunk)
+            self.store.series(device_id).extend(chunk)
+        self.stats["batches"] += 1
+        self.stats["samples"] += len(records)
+
+    def changed_since(self, since: float) -> List[DeviceState]:
+        """Devices updated after the monotonic time `since`"""
+        return [state for state in list(self.devices.values()) if state.updated_at > since]
+
+    def latest(self) -> Optional[DeviceState]:
+        """The most recently updated device, if any"""
+        states = [state for state in list(self.devices.values()) if state.last is not None]
+        return max(states, key=lambda state: state.updated_at) if states else None
+
+
+def build_records(timestamps, cpu, mem, load, codes) -> np.ndarray:
+    records = np.empty(len(timestamps), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    records['cpu'] = cpu
+    records['mem'] = mem
+    records['combined_load'] = load
+    records['sentiment'] = codes
+    return records
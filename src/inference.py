@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class SentimentInferenceEngine:
+    """Batched, cached text classification over DataFrame columns"""
+
+    def __init__(self, classifier: Callable, batch_size: int = 1000, cache_size: int = 10000):
+        self.classifier = classifier
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        # Requests may classify concurrently from worker threads
+        self._lock = threading.Lock()
+        self.stats = {
+            "rows": 0,
+            "unique_texts": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "batches": 0,
+            "elapsed_seconds": 0.0
+        }
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes):
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: bytes, result: Tuple[str, float]):
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def classify_texts(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Classify distinct texts, serving repeats from the LRU cache"""
+        keys = [self._key(text) for text in texts]
+        results: List[Any] = [self._cache_get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        self._count(cache_hits=len(texts) - len(misses), cache_misses=len(misses))
+
+        for start in range(0, len(misses), self.batch_size):
+            batch = misses[start:start + self.batch_size]
+            outputs = self.classifier([texts[i] for i in batch], batch_size=len(batch))
+            self._count(batches=1)
+            for i, output in zip(batch, outputs):
+                result = (output["label"], float(output["score"]))
+                self._cache_put(keys[i], result)
+                results[i] = result
+
+        return results
+
+    def classify(self, notes: pd.Series) -> pd.DataFrame:
+        """Classify every row of a text Series, returning label/score columns aligned to it"""
+        start = time.perf_counter()
+
+        codes, uniques = pd.factorize(notes.astype(str), sort=False)
+        results = self.classify_texts(list(uniques))
+        label_values = np.array([label for label, _ in results], dtype=object)
+        score_values = np.array([score for _, score in results], dtype=np.float64)
+
+        self._count(rows=len(notes), unique_texts=len(uniques), elapsed_seconds=time.perf_counter() - start)
+
+        return pd.DataFrame({
+            "sentiment_label": label_values[codes],
+            "sentiment_score": score_values[codes]
+        }, index=notes.index)
+
+    def attach(self, data: pd.DataFrame, column: str = "notes") -> pd.DataFrame:
+        """Classify `column` and add the per-row results onto the frame"""
+        results = self.classify(data[column])
+        data["sentiment_label"] = results["sentiment_label"]
+        data["sentiment_score"] = results["sentiment_score"]
+        return data
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            cache_size = len(self._cache)
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        elapsed = stats["elapsed_seconds"]
+        return {
+            **stats,
+            "cache_size": cache_size,
+            "cache_hit_rate": stats["cache_hits"] / lookups if lookups else 0.0,
+            "rows_per_second": stats["rows"] / elapsed if elapsed else 0.0
+        }
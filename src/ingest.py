@@ -0,0 +1,160 @@
+import asyncio
+import inspect
+import logging
+import math
+from typing import Any, Callable, Dict, List
+
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    import json as _json
+
+# First non-whitespace byte of a JSON payload; anything else is treated as msgpack
+JSON_START = (ord('{'), ord('['))
+READ_SIZE = 256 * 1024
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def valid_sample(sample) -> bool:
+    """A dict with numeric cpu_usage and memory_usage; device_id (not "", "." or "..") and timestamp are optional"""
+    if not isinstance(sample, dict):
+        return False
+    if not (_is_number(sample.get("cpu_usage")) and _is_number(sample.get("memory_usage"))):
+        return False
+    device_id = sample.get("device_id")
+    if device_id is not None and (isinstance(device_id, bool) or not isinstance(device_id, (str, int))):
+        return False
+    if device_id in ("", ".", ".."):
+        return False
+    timestamp = sample.get("timestamp")
+    return timestamp is None or isinstance(timestamp, str) or _is_number(timestamp)
+
+
+class IngestServer:
+    """
+    TCP listener for device metric batches.
+
+    Each connection streams either newline-delimited JSON or msgpack
+    (detected from its first byte). Every message is one sample
+    ``{device_id, cpu_usage, memory_usage, timestamp}`` or a list of them.
+    All samples decoded from one socket read are passed to `handle_batch`
+    together, so per-call overhead is paid per read rather than per sample.
+    A coroutine `handle_batch` is awaited before the next read, so a slow
+    consumer applies backpressure to its connection instead of queueing.
+    Malformed lines and samples are counted in `stats["rejected"]` and
+    skipped; only an unreadable msgpack stream, or an NDJSON line longer
+    than `max_line_bytes` (counted in `stats["oversized"]`), closes the
+    connection.
+    """
+
+    def __init__(self, handle_batch: Callable[[List[Dict[str, Any]]], Any],
+                 host: str = "0.0.0.0", port: int = 5003, max_line_bytes: int = 1024 * 1024):
+        self.handle_batch = handle_batch
+        self.host = host
+        self.port = port
+        self.max_line_bytes = max_line_bytes
+        self.server = None
+        self._connections = set()
+        self.logger = logging.getLogger(__name__)
+        self.stats = {"connections": 0, "bytes": 0, "messages": 0, "samples": 0, "rejected": 0, "oversized": 0,
+                      "errors": 0}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Ingest server running on port {self.port}")
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            # Handlers may be waiting on handle_batch; let them finish cancelling before returning
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            data = await reader.read(READ_SIZE)
+            stripped = data.lstrip()
+            while data and not stripped:
+                data = await reader.read(READ_SIZE)
+                stripped = data.lstrip()
+            if not data:
+                return
+            if stripped[0] in JSON_START:
+                await self._read_ndjson(reader, data)
+            else:
+                await self._read_msgpack(reader, data)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.logger.error(f"Ingest connection error: {str(e)}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_ndjson(self, reader: asyncio.StreamReader, data: bytes):
+        pending = b""
+        while data:
+            self.stats["bytes"] += len(data)
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            await self._dispatch(self._decode_lines(lines))
+            if len(pending) > self.max_line_bytes:
+                # Without a newline the unfinished line would grow without bound
+                self.stats["oversized"] += 1
+                self.logger.warning(f"Closing ingest connection: line longer than {self.max_line_bytes} bytes")
+                return
+            data = await reader.read(READ_SIZE)
+        await self._dispatch(self._decode_lines([pending]))
+
+    def _decode_lines(self, lines):
+        messages = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                messages.append(_json.loads(line))
+            except ValueError:
+                self.stats["rejected"] += 1
+        return messages
+
+    async def _read_msgpack(self, reader: asyncio.StreamReader, data: bytes):
+        import msgpack
+
+        unpacker = msgpack.Unpacker(raw=False)
+        while data:
+            self.stats["bytes"] += len(data)
+            unpacker.feed(data)
+            await self._dispatch(unpacker)
+            data = await reader.read(READ_SIZE)
+
+    async def _dispatch(self, messages):
+        samples = []
+        for message in messages:
+            self.stats["messages"] += 1
+            for sample in message if isinstance(message, list) else [message]:
+                if valid_sample(sample):
+                    samples.append(sample)
+                else:
+                    self.stats["rejected"] += 1
+        if not samples:
+            return
+        self.stats["samples"] += len(samples)
+        try:
+            result = self.handle_batch(samples)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            # A failed batch is lost, but the device's connection stays usable
+            self.stats["errors"] += 1
+            self.logger.error(f"Ingest batch error: {str(e)}")
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobManager:
+    """
+    Run blocking work off the event loop with bounded concurrency.
+
+    At most `max_concurrency` jobs execute at once in the thread pool; others
+    wait their turn, and submissions beyond `max_queue` waiting jobs are
+    rejected. Finished jobs are kept (up to `retention`) so clients can poll
+    for results. A cancelled job keeps its slot until its thread returns,
+    since the thread itself cannot be interrupted.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 64, retention: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retention = retention
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="job")
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._events: Dict[str, asyncio.Event] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Guards the queue-depth check and the enqueue so they happen as one step
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "cancelled": 0,
+                      "rejected": 0}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @property
+    def queue_depth(self) -> int:
+        return self.stats["queued"]
+
+    def _enqueue(self):
+        """Take a queue slot, or raise QueueFullError if none is left"""
+        with self._lock:
+            if self.stats["queued"] >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queue} waiting)")
+            self.stats["queued"] += 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in the pool once a concurrency slot is free"""
+        self._enqueue()
+        return await self._execute(fn, *args)
+
+    async def _execute(self, fn: Callable, *args) -> Any:
+        """Wait for a concurrency slot for an already queued job, then run it"""
+        try:
+            await self.semaphore.acquire()
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        finally:
+            with self._lock:
+                self.stats["queued"] -= 1
+
+        self.stats["running"] += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        try:
+            # Shielded: cancelling the caller can't stop the thread, so its slot is held until it returns
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            future.add_done_callback(self._release)
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            self._release(future)
+            raise
+        self.stats["completed"] += 1
+        self._release(future)
+        return result
+
+    def _release(self, future: asyncio.Future):
+        """Free the concurrency slot of a job whose thread has returned"""
+        if not future.cancelled():
+            # Retrieved so a cancelled job's error isn't reported as never retrieved
+            future.exception()
+        self.stats["running"] -= 1
+        self.semaphore.release()
+
+    def submit(self, fn: Callable, *args) -> Dict[str, Any]:
+        """Start fn(*args) as a background job and return its record"""
+        # Counted as queued right away, so back-to-back submits see each other
+        self._enqueue()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        self.jobs[job_id] = job
+        self._events[job_id] = asyncio.Event()
+        self._prune()
+        asyncio.get_running_loop().create_task(self._run_job(job, fn, args))
+        return job
+
+    async def _run_job(self, job: Dict[str, Any], fn: Callable, args):
+        try:
+            job["result"] = await self._execute(self._mark_running(job, fn), *args)
+            job["status"] = "done"
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+            raise
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            event = self._events.pop(job["job_id"], None)
+            if event is not None:
+                event.set()
+
+    @staticmethod
+    def _mark_running(job: Dict[str, Any], fn: Callable) -> Callable:
+        def wrapper(*args):
+            job["status"] = "running"
+            return fn(*args)
+        return wrapper
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the job once it finishes or `timeout` seconds pass, whichever is first"""
+        event = self._events.get(job_id)
+        if event is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the retention limit"""
+        excess = len(self.jobs) - self.retention
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id]["finished_at"] is not None:
+                del self.jobs[job_id]
+                excess -= 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": self.queue_depth,
+            "max_concurrency": self.max_concurrency,
+            "tracked_jobs": len(self.jobs)
+        }
@@ -1,34 +1,147 @@
-from fastapi import FastAPI
-from data_pipeline import DataPipeline
+from datetime import datetime
+import time
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from src.data_pipeline import DataPipeline
 from ai_analyzer import AIAnalyzer
-from config import settings
-import pandas as pd
+from src.partitioned import PartitionBy, run_partitioned, shutdown_pools
+from src.config import settings
+from src.sources import RowFilter
+from src.serialization import dumps
+from src.jobs import JobManager, QueueFullError
+from src.metrics import registry
 
-app = FastAPI(title="Data Engineering Platform")
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson and numpy support"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+app = FastAPI(title="Data Engineering Platform", default_response_class=FastJSONResponse)
 pipeline = DataPipeline()
 analyzer = AIAnalyzer()
+jobs = JobManager(
+    max_concurrency=settings.JOB_MAX_CONCURRENCY,
+    max_queue=settings.JOB_MAX_QUEUE,
+    retention=settings.JOB_RETENTION
+)
+registry.register_collector("pipeline", pipeline.get_metrics)
+registry.register_collector("inference", analyzer.inference_engine.get_stats)
+registry.register_collector("jobs", jobs.get_metrics)
+
+@app.on_event("startup")
+async def warm_up_models():
+    # Models load lazily on the first request unless warm-up is enabled
+    if settings.WARMUP_MODELS:
+        analyzer.warm_up(background=True)
+
+@app.on_event("shutdown")
+async def stop_workers():
+    # The partition worker pool outlives requests, so stop it with the app
+    shutdown_pools()
 
 @app.get("/")
 async def root():
     return {"message": "Data Engineering Platform API"}
 
-@app.post("/process-data")
-async def process_data(data_source: str):
-    # Process data through the pipeline
-    processed_data = pipeline.process(data_source)
-    
-    # Convert DataFrame to dict for JSON serialization
-    if isinstance(processed_data, pd.DataFrame):
-        processed_data = processed_data.to_dict(orient='records')
-    
-    # Get analysis results
-    analysis = analyzer.analyze(processed_data)
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+def run_analysis(data_source: str, parallel: bool = False, partition_by: PartitionBy = "device_id",
+                 device_id: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Pipeline + analysis; CPU-bound, so always called from the job executor"""
+    start_time = time.perf_counter()
+    row_filter = RowFilter.from_params(device_id, start, end)
+    cache = pipeline.result_cache
+    cache_key = None
+    if cache is not None:
+        # Serial and partitioned runs, and differently configured analyzers, shape results differently
+        mode = f"parallel:{partition_by}" if parallel else "serial"
+        cache_key = pipeline.cache_key(
+            data_source, row_filter.key() if row_filter else None, mode, analyzer.config_key()
+        )
+    analysis = cache.get(cache_key) if cache_key is not None else None
+    cached = analysis is not None
+
+    if not cached:
+        if parallel:
+            # Clean, validate and aggregate partitions in a pool of settings.MAX_WORKERS processes
+            analysis = run_partitioned(pipeline, analyzer, data_source, partition_by=partition_by, row_filter=row_filter)
+        else:
+            # Process data through the pipeline; the columnar frame goes straight to the analyzer
+            processed_data = pipeline.process(data_source, row_filter=row_filter, columns=analyzer.analysis_columns)
+            
+            # Get analysis results
+            analysis = analyzer.analyze(processed_data)
+
+        if cache_key is not None:
+            # inference_stats is a live counter snapshot, so hits get the current one instead
+            classifications = {k: v for k, v in analysis["classifications"].items() if k != "inference_stats"}
+            cache.put(cache_key, {**analysis, "classifications": classifications})
+    else:
+        analysis = {
+            **analysis,
+            "classifications": {**analysis["classifications"],
+                                "inference_stats": analyzer.inference_engine.get_stats()}
+        }
     
-    # Ensure all data is JSON serializable
-    response = {
+    # Concurrent jobs share the pipeline, so this run's figures come from its own result
+    metrics = {
+        **pipeline.get_metrics(),
+        "processed_records": analysis["insights"]["total_records"],
+        "processing_time": time.perf_counter() - start_time,
+        "cached": cached
+    }
+    return {
         "status": "success",
         "analysis": analysis,
-        "metrics": pipeline.get_metrics()
+        "metrics": metrics
     }
+
+def check_source(data_source: str):
+    """Reject sources outside settings.DATA_ROOT (or unsupported) before any work is queued"""
+    try:
+        pipeline.resolve_source(data_source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/process-data")
+async def process_data(data_source: str, parallel: bool = False, partition_by: PartitionBy = "device_id",
+                       device_id: Optional[str] = None, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None):
+    check_source(data_source)
+    # device_id (comma-separated) and [start, end) are pushed down into file reads
+    # Offloaded so one large request doesn't block the event loop for everyone else
+    try:
+        response = await jobs.run(run_analysis, data_source, parallel, partition_by, device_id, start, end)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
-    return response 
\ No newline at end of file
+    # Returned directly so FastAPI skips jsonable_encoder; orjson handles numpy types
+    return FastJSONResponse(response)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(data_source: str, parallel: bool = False, partition_by: PartitionBy = "device_id",
+                     device_id: Optional[str] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None):
+    check_source(data_source)
+    try:
+        job = jobs.submit(run_analysis, data_source, parallel, partition_by, device_id, start, end)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/jobs")
+async def job_metrics():
+    return jobs.get_metrics()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    # wait > 0 long-polls until the job finishes or the timeout passes
+    job = await jobs.wait(job_id, min(wait, 60))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return FastJSONResponse(job)
@@ -0,0 +1,217 @@
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Sequence, Tuple
+
+# Upper bounds in seconds; covers sub-millisecond predicts up to multi-second pipeline runs
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class _Timer:
+    """Context manager that observes its elapsed time; cheaper than a generator-based one"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations for one label combination"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def samples(self, name: str, labels: Dict[str, str]):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}"
+        yield f"{name}_sum{_format_labels(labels)} {total}"
+        yield f"{name}_count{_format_labels(labels)} {count}"
+
+
+class Counter:
+    """Monotonic counter for one label combination"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: Dict[str, str]):
+        yield f"{name}{_format_labels(labels)} {self.value}"
+
+
+class MetricFamily:
+    """A named metric with one child per combination of label values"""
+
+    def __init__(self, name: str, help_text: str, kind: str, factory: Callable,
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str, **kwargs: str):
+        """The child for these label values; bind it once outside hot loops"""
+        key = values or tuple(str(kwargs[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def __getattr__(self, attr):
+        # Unlabelled families forward observe/time/inc to their only child
+        if attr.startswith("_") or self.labelnames:
+            raise AttributeError(attr)
+        return getattr(self._default, attr)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, child in list(self._children.items()):
+            yield from child.samples(self.name, dict(zip(self.labelnames, key)))
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format.
+
+    Histograms and counters are updated on the hot path. Components that
+    already keep a `stats` dict are exposed through collectors, which are
+    only read when `/metrics` is scraped.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, help_text: str, kind: str, factory: Callable, labelnames) -> MetricFamily:
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = MetricFamily(name, help_text, kind, factory, labelnames)
+                self.families[name] = family
+        return family
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        return self._family(name, help_text, "histogram", lambda: Histogram(buckets), labelnames)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "counter", Counter, labelnames)
+
+    def register_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """Expose numeric values of `collect()` as `<prefix>_<key>` gauges; re-registering replaces"""
+        self.collectors[prefix] = collect
+
+    def render(self) -> str:
+        lines = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        for prefix, collect in list(self.collectors.items()):
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def timed(child) -> Callable:
+    """Decorator observing each call's duration on a histogram child"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class LogSampler:
+    """Let one in every `every` events through, for per-tick logging on hot paths"""
+
+    __slots__ = ("every", "seen")
+
+    def __init__(self, every: int):
+        self.every = max(int(every), 1)
+        self.seen = 0
+
+    def __call__(self) -> bool:
+        self.seen += 1
+        return (self.seen - 1) % self.every == 0
+
+
+registry = MetricsRegistry()
+
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds", "DataPipeline stage duration in seconds", ("stage",))
+PIPELINE_RUNS = registry.counter("pipeline_runs_total", "DataPipeline.process calls", ("result",))
+ANALYZER_STAGE_SECONDS = registry.histogram(
+    "analyzer_stage_seconds", "AIAnalyzer stage duration in seconds", ("stage",))
+MODEL_PREDICT_SECONDS = registry.histogram(
+    "model_predict_seconds", "IsolationForest predict duration in seconds", ("path",))
+JSON_ENCODE_SECONDS = registry.histogram(
+    "json_encode_seconds", "JSON encoding duration in seconds", ("path",))
+FRAME_ENCODE_SECONDS = registry.histogram(
+    "frame_encode_seconds", "Binary websocket frame encoding duration in seconds", ("format",))
+WS_SEND_SECONDS = registry.histogram("ws_send_seconds", "Websocket send duration per frame in seconds")
+TICK_SECONDS = registry.histogram("tick_build_seconds", "Time to build and analyze one tick in seconds")
+TICK_JITTER_SECONDS = registry.histogram(
+    "tick_jitter_seconds", "Producer wake-up time after its scheduled tick in seconds",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
@@ -0,0 +1,48 @@
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+
+class ModelStore:
+    """Persist fitted models under a directory with atomic replacement"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    def _model_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.joblib")
+
+    def save(self, name: str, model: Any, **metadata) -> str:
+        """Write the model to a temp file and rename it over the previous version"""
+        import joblib
+
+        os.makedirs(self.path, exist_ok=True)
+        target = self._model_path(name)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                joblib.dump({"model": model, "saved_at": time.time(), **metadata}, f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return target
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the stored payload ({"model", "saved_at", ...}) or None"""
+        target = self._model_path(name)
+        if not os.path.exists(target):
+            return None
+
+        import joblib
+
+        try:
+            return joblib.load(target)
+        except Exception as e:
+            self.logger.error(f"Failed to load model {name} from {target}: {str(e)}")
+            return None
@@ -0,0 +1,278 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from multiprocessing import get_context
+from typing import Any, Dict, List, Literal, Optional, Union, get_args
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import settings
+from src.data_pipeline import DataPipeline
+from src.sources import RowFilter, open_dataset
+from src.aggregates import AnalysisAggregate
+from src.anomaly import zscore_anomalies
+
+PartitionBy = Literal["device_id", "rows"]
+PARTITION_MODES = get_args(PartitionBy)
+
+# One long-lived pool per worker count, so processes start once rather than per request
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """The shared pool of `max_workers` processes, started on first use"""
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            # Spawned, not forked: the parent runs event-loop and executor threads whose locks fork would copy
+            pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+            _pools[max_workers] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+def _discard_pool(max_workers: int, pool: ProcessPoolExecutor):
+    """Forget a pool whose worker died, so the next run starts a fresh one"""
+    with _pools_lock:
+        if _pools.get(max_workers) is pool:
+            del _pools[max_workers]
+
+
+def split_partitions(data: pd.DataFrame, partition_by: PartitionBy, n_partitions: int) -> List[pd.DataFrame]:
+    """Split a frame into at most `n_partitions` pieces by device or by row range"""
+    if partition_by == "device_id":
+        # Hash devices into buckets so every device lands wholly in one partition
+        codes, _ = pd.factorize(data["device_id"], sort=True)
+        buckets = codes % n_partitions
+        return [data[buckets == i] for i in range(n_partitions) if (buckets == i).any()]
+    if partition_by == "rows":
+        bounds = np.linspace(0, len(data), n_partitions + 1, dtype=int)
+        return [data.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+    raise ValueError(f"Unsupported partition mode: {partition_by}")
+
+
+def plan_file_partitions(dataset, partition_by: PartitionBy, n_partitions: int, columns: List[str],
+                         row_filter: Optional[RowFilter] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Describe partitions of a Parquet dataset that workers load themselves.
+
+    Only the device_id column is read here, one row group at a time, to find
+    which row groups and rows each partition covers. Device partitions become
+    a device filter and row partitions become row-group slices, so each
+    worker reads just its own rows. Every partition also carries its rows'
+    positions in the filtered source, which is the serial path's index.
+    Returns None when workers cannot load partitions themselves (non-Parquet
+    formats, or filters that must be applied after loading).
+    """
+    import pyarrow.dataset as ds
+
+    if not isinstance(dataset.format, ds.ParquetFileFormat) or "device_id" not in dataset.schema.names:
+        return None
+    expression, residual = row_filter.expression(dataset.schema) if row_filter else (None, False)
+    if residual:
+        return None
+
+    schema = dataset.schema
+    row_groups = [
+        row_group for fragment in dataset.get_fragments(filter=expression)
+        for row_group in fragment.split_by_row_group(filter=expression, schema=schema)
+    ]
+    keys = [
+        row_group.to_table(schema=schema, columns=["device_id"], filter=expression).column("device_id").to_pandas()
+        for row_group in row_groups
+    ]
+    sizes = np.array([len(key) for key in keys], dtype=np.int64)
+    offsets = np.r_[0, np.cumsum(sizes)]
+    start, end = (row_filter.start, row_filter.end) if row_filter else (None, None)
+
+    def spec(pieces, partition_filter, index):
+        return {"pieces": pieces, "schema": schema, "columns": columns, "row_filter": partition_filter, "index": index}
+
+    partitions = []
+    if partition_by == "device_id":
+        # Same device buckets as split_partitions; rows without a device are dropped by cleaning anyway
+        codes, uniques = pd.factorize(pd.concat(keys, ignore_index=True) if keys else pd.Series([], dtype=object),
+                                      sort=True)
+        buckets = np.where(codes >= 0, codes % n_partitions, -1)
+        for i in range(n_partitions):
+            positions = np.flatnonzero(buckets == i)
+            if len(positions) == 0:
+                continue
+            owners = np.unique(np.searchsorted(offsets, positions, side="right") - 1)
+            devices = [str(device) for device in uniques[i::n_partitions]]
+            partitions.append(spec([(row_groups[j], None, None) for j in owners],
+                                   RowFilter(devices, start, end), positions))
+    elif partition_by == "rows":
+        bounds = np.linspace(0, offsets[-1], n_partitions + 1, dtype=int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi <= lo:
+                continue
+            pieces = []
+            for j in np.flatnonzero((offsets[:-1] < hi) & (offsets[1:] > lo)):
+                piece_lo, piece_hi = max(lo, offsets[j]) - offsets[j], min(hi, offsets[j + 1]) - offsets[j]
+                whole = piece_lo == 0 and piece_hi == sizes[j]
+                pieces.append((row_groups[j], None if whole else int(piece_lo), None if whole else int(piece_hi)))
+            partitions.append(spec(pieces, row_filter, pd.RangeIndex(lo, hi)))
+    else:
+        raise ValueError(f"Unsupported partition mode: {partition_by}")
+    return partitions
+
+
+def _load_partition(spec: Dict[str, Any]) -> pd.DataFrame:
+    """Worker: read the row groups (or slices of them) a planned partition covers"""
+    import pyarrow as pa
+
+    row_filter = spec["row_filter"]
+    expression, _ = row_filter.expression(spec["schema"]) if row_filter else (None, False)
+    tables = []
+    for row_group, lo, hi in spec["pieces"]:
+        table = row_group.to_table(schema=spec["schema"], columns=spec["columns"], filter=expression)
+        tables.append(table if lo is None else table.slice(lo, hi - lo))
+    data = pa.concat_tables(tables).to_pandas()
+    data.index = spec["index"]
+    return data
+
+
+def _process_partition(partition: Union[pd.DataFrame, Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker: (load ->) clean -> validate -> aggregate one partition"""
+    if isinstance(partition, dict):
+        partition = _load_partition(partition)
+    pipeline = DataPipeline()
+    cleaned = pipeline._clean_data(partition)
+    pipeline._validate_data(cleaned)
+
+    columns = options["columns"]
+    aggregate = AnalysisAggregate(columns, threshold=options["threshold"])
+    aggregate.update(cleaned, score_anomalies=False)
+
+    result = {
+        "aggregate": aggregate,
+        "notes": Counter(cleaned["notes"].value_counts().to_dict()),
+        # Index labels come along so the parent can pick the first rows in source order
+        "head_notes": cleaned["notes"].head(5),
+        "anomalies": None,
+        "block": None
+    }
+    if options["local_anomalies"]:
+        # Partitions hold whole devices, so per-device statistics are exact here
+        result["anomalies"] = zscore_anomalies(
+            cleaned, columns, group_by="device_id",
+            robust=options["robust"], threshold=options["threshold"]
+        )
+    else:
+        # Global statistics need every partition, so hand the numeric block back
+        block_columns = columns + ([options["group_by"]] if options["group_by"] else [])
+        result["block"] = cleaned[block_columns]
+    return result
+
+
+def _merge_anomalies(parts: List[Dict[str, Any]], columns: List[str], max_values: int = 5) -> Dict[str, Any]:
+    """Sum per-partition anomaly counts and keep the first flagged values in source order"""
+    merged = {}
+    for col in columns:
+        values = sorted((index, value) for part in parts for index, value in part[col]["values"].items())
+        merged[col] = {
+            "count": sum(int(part[col]["count"]) for part in parts),
+            "values": dict(values[:max_values])
+        }
+    return merged
+
+
+def run_partitioned(
+    pipeline: DataPipeline,
+    analyzer,
+    data_source: Union[str, pd.DataFrame],
+    partition_by: PartitionBy = "device_id",
+    max_workers: Optional[int] = None,
+    row_filter: Optional[RowFilter] = None
+) -> Dict[str, Any]:
+    """
+    Run clean/validate/analysis over partitions in a process pool.
+
+    Parquet sources are planned by plan_file_partitions and each worker
+    reads its own partition; other sources are loaded here and split.
+    Returns the same shape as AIAnalyzer.analyze. Sentiment classification of
+    the distinct notes stays in this process, where the model and its cache live.
+    """
+    max_workers = max_workers or settings.MAX_WORKERS
+    start = time.perf_counter()
+    local_anomalies = partition_by == "device_id" and analyzer.anomaly_group_by == "device_id"
+    partitions = None
+    if isinstance(data_source, str) and data_source != "sample":
+        source = pipeline.resolve_source(data_source)
+        file_format = pipeline._file_format(source)
+        if file_format != "csv":
+            dataset = open_dataset(source, file_format)
+            available = pipeline.projected_columns(dataset.schema.names, analyzer.analysis_columns)
+            # Whole devices only matter when anomalies are scored per device; otherwise row slices
+            # merge to the same result and each worker reads only its own row groups
+            partitions = plan_file_partitions(dataset, partition_by if local_anomalies else "rows",
+                                              max_workers, available, row_filter)
+    if partitions is None:
+        if isinstance(data_source, pd.DataFrame):
+            data = row_filter.apply(data_source) if row_filter else data_source
+        else:
+            data = pipeline._load_data(data_source, row_filter, analyzer.analysis_columns)
+        available = list(data.columns)
+        partitions = split_partitions(data, partition_by, max_workers)
+    columns = [col for col in analyzer.anomaly_columns if col in available]
+    options = {
+        "columns": columns,
+        "threshold": settings.ANOMALY_THRESHOLD,
+        "robust": analyzer.robust_anomalies,
+        "group_by": analyzer.anomaly_group_by,
+        "local_anomalies": local_anomalies
+    }
+
+    pool = get_pool(max_workers)
+    try:
+        results = list(pool.map(_process_partition, partitions, repeat(options)))
+    except BrokenProcessPool:
+        _discard_pool(max_workers, pool)
+        raise
+
+    aggregate = AnalysisAggregate(columns, threshold=options["threshold"])
+    notes = Counter()
+    for result in results:
+        aggregate.merge(result["aggregate"])
+        notes.update(result["notes"])
+
+    # Report the same first flagged values as the serial path, whatever the partition order
+    if options["local_anomalies"]:
+        aggregate.set_anomalies(_merge_anomalies([result["anomalies"] for result in results], columns))
+    elif results:
+        blocks = pd.concat([result["block"] for result in results]).sort_index(kind="stable")
+        aggregate.set_anomalies(zscore_anomalies(
+            blocks, columns, group_by=options["group_by"],
+            robust=options["robust"], threshold=options["threshold"]
+        ))
+    pipeline._record_run(time.perf_counter() - start, aggregate.total_records)
+
+    # Classify each distinct note once and weight by its row count
+    texts = list(notes)
+    sentiments = dict(zip(texts, analyzer.inference_engine.classify_texts(texts)))
+    for text, count in notes.items():
+        aggregate.sentiment_counts[sentiments[text][0]] += count
+    # Device partitions interleave in the source, so merge their heads back into row order
+    head_notes = pd.concat([result["head_notes"] for result in results]).sort_index(kind="stable").head(5) \
+        if results else []
+    aggregate.text_sentiment = [
+        {"label": sentiments[text][0], "score": sentiments[text][1]} for text in head_notes
+    ]
+
+    analysis = aggregate.result()
+    analysis["classifications"]["inference_stats"] = analyzer.inference_engine.get_stats()
+    return analysis
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResultCache:
+    """
+    Two-tier cache for analysis results.
+
+    The memory tier is an LRU of at most `max_entries` results; the optional
+    disk tier pickles results under `disk_path` and evicts the oldest files
+    once they exceed `max_disk_bytes`. Entries in both tiers expire after
+    `ttl` seconds. The disk tier is best-effort: a result that cannot be
+    written (full disk, unpicklable value) is logged and stays memory-only.
+    """
+
+    def __init__(self, max_entries: int = 32, ttl: float = 300, disk_path: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_errors": 0}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+            self._memory_put(key, value, now)
+        return value
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now)
+        try:
+            self._disk_put(key, value)
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            self.logger.warning(f"Result cache disk write failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.disk_path and os.path.isdir(self.disk_path):
+            for name in os.listdir(self.disk_path):
+                if name.endswith(".pkl"):
+                    self._remove(os.path.join(self.disk_path, name))
+
+    def _memory_put(self, key: str, value: Any, now: float):
+        self._memory[key] = (now + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.pkl")
+
+    def _disk_get(self, key: str, now: float) -> Optional[Any]:
+        if not self.disk_path:
+            return None
+        path = self._disk_file(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                self._remove(path)
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _disk_put(self, key: str, value: Any):
+        if not self.disk_path:
+            return
+        os.makedirs(self.disk_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_file(key))
+        finally:
+            # Only left behind when the dump or rename failed
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._disk_evict()
+
+    def _disk_evict(self):
+        """Remove expired files, then the oldest ones until the tier fits its size budget"""
+        now = time.time()
+        files = []
+        for name in os.listdir(self.disk_path):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.disk_path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_mtime + self.ttl <= now:
+                self._remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.stats["evictions"] += 1
+        except OSError:
+            # Another thread already evicted it
+            pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "cache_hits": self.stats["hits"],
+            "cache_misses": self.stats["misses"],
+            "cache_hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "cache_memory_hits": self.stats["memory_hits"],
+            "cache_disk_hits": self.stats["disk_hits"],
+            "cache_evictions": self.stats["evictions"],
+            "cache_disk_errors": self.stats["disk_errors"],
+            "cache_entries": len(self._memory)
+        }
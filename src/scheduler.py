@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from src.metrics import TICK_JITTER_SECONDS
+
+
+class TickScheduler:
+    """
+    Fixed-rate ticks on the monotonic clock.
+
+    Each deadline is the previous deadline plus `period`, not "now plus
+    period", so time spent building and sending a tick does not accumulate
+    as drift. When the loop falls a whole period or more behind, the missed
+    ticks are skipped and coalesced into the next one instead of being run
+    back to back. Jitter (wake-up minus deadline) and lag are recorded.
+    """
+
+    def __init__(self, period: float, min_period: float = 0.01):
+        self.min_period = min_period
+        self.period = max(period, min_period)
+        self.next_deadline: Optional[float] = None
+        self.last_tick: Optional[float] = None
+        self.stats = {"ticks": 0, "skipped": 0, "period": self.period, "lag_seconds": 0.0, "max_lag_seconds": 0.0}
+
+    def set_period(self, period: float):
+        """Change the rate; a shorter period takes effect from the last tick rather than the old deadline"""
+        self.period = max(period, self.min_period)
+        self.stats["period"] = self.period
+        if self.last_tick is not None and self.next_deadline is not None:
+            self.next_deadline = min(self.next_deadline, self.last_tick + self.period)
+
+    async def wait(self) -> float:
+        """Sleep until the next tick is due and return the monotonic time it fired"""
+        if self.next_deadline is None:
+            self.next_deadline = time.monotonic()
+        delay = self.next_deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        lag = max(now - self.next_deadline, 0.0)
+        TICK_JITTER_SECONDS.observe(lag)
+        self.stats["ticks"] += 1
+        self.stats["lag_seconds"] = lag
+        self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+
+        self.next_deadline += self.period
+        if now >= self.next_deadline:
+            missed = int((now - self.next_deadline) // self.period) + 1
+            self.stats["skipped"] += missed
+            self.next_deadline += missed * self.period
+        self.last_tick = now
+        return now
+
+
+def subscription_params(path: Optional[str], default_interval: float, min_interval: float) -> Dict:
+    """
+    Per-client stream options from the websocket URL query string.
+
+    ``?rate=10`` (Hz) or ``?interval=0.1`` (seconds) sets the client's own
+    tick rate, clamped to `min_interval`; ``?device=device_3`` focuses the
+    stream on one ingested device.
+    """
+    query = parse_qs(urlsplit(path or "").query)
+    interval = default_interval
+    try:
+        if "rate" in query:
+            interval = 1.0 / float(query["rate"][0])
+        elif "interval" in query:
+            interval = float(query["interval"][0])
+    except (ValueError, ZeroDivisionError):
+        interval = default_interval
+    if not interval > 0:
+        interval = default_interval
+    return {
+        "interval": max(interval, min_interval),
+        "device": query["device"][0] if query.get("device") else None
+    }
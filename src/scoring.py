@@ -0,0 +1,94 @@
+import asyncio
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.metrics import MODEL_PREDICT_SECONDS
+
+PREDICT_SECONDS = MODEL_PREDICT_SECONDS.labels(path="scorer")
+
+
+class BatchScorer:
+    """
+    Coalesce single-row model calls into micro-batches.
+
+    Callers await `score(row)`; rows arriving within `max_latency` seconds of
+    the first pending row (or until `max_batch_size` rows are pending) are
+    scored together with one `decision_function` call in a worker thread, and
+    each caller's future is resolved with its own result.
+    A row that arrives while no batch is pending or being scored is flushed
+    at once, so a lone caller never waits out the batching window; rows that
+    queued behind a batch are flushed as soon as it finishes. A batch stops
+    counting as in flight before its callers are woken, so a caller that
+    scores again straight away also takes the fast path.
+    """
+
+    def __init__(self, get_model: Callable, max_latency: float = 0.01,
+                 max_batch_size: int = 256, executor=None):
+        self.get_model = get_model
+        self.max_latency = max_latency
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+        self._pending: List[Tuple[Sequence[float], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Strong references to in-flight batches; the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        # Batches flushed but not yet resolved; finished tasks may linger in _tasks until their callbacks run
+        self._in_flight = 0
+        self.stats = {"rows": 0, "batches": 0, "max_batch": 0}
+
+    async def score(self, row: Sequence[float]) -> Tuple[int, float]:
+        """Return (prediction, decision score) for a single row"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_batch_size or (len(self._pending) == 1 and not self._in_flight):
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_latency, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._in_flight += 1
+        task = asyncio.get_running_loop().create_task(self._score_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score_batch(self, batch):
+        rows = np.asarray([row for row, _ in batch], dtype=np.float64)
+        loop = asyncio.get_running_loop()
+        try:
+            predictions, scores = await loop.run_in_executor(self.executor, self._predict, rows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            # Rows that queued behind this batch have nothing left to wait for
+            if self._pending and not self._in_flight:
+                self._flush()
+
+        self.stats["rows"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for (_, future), prediction, score in zip(batch, predictions, scores):
+            if not future.done():
+                future.set_result((int(prediction), float(score)))
+
+    def _predict(self, rows: np.ndarray):
+        model = self.get_model()
+        with PREDICT_SECONDS.time():
+            scores = model.decision_function(rows)
+        # IsolationForest.predict is this threshold on decision_function, so score the forest once
+        return np.where(scores < 0, -1, 1), scores
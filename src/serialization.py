@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from src.metrics import JSON_ENCODE_SECONDS
+
+ENCODE_SECONDS = JSON_ENCODE_SECONDS.labels(path="response")
+
+# Timestamps stay datetime64 through the pipeline and are formatted only here
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(value: Any) -> Any:
+    """Format datetime-like values for JSON; strings and None pass through"""
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types orjson doesn't handle natively"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return format_timestamp(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize analysis results with orjson.
+
+    Numpy arrays/scalars and non-string dict keys (e.g. integer index labels)
+    are handled natively, so results need no int()/float()/str() passes.
+    """
+    import orjson
+
+    with ENCODE_SECONDS.time():
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
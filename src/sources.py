@@ -0,0 +1,121 @@
+import os
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+def _naive_utc(value: Union[str, datetime]) -> pd.Timestamp:
+    """Timestamps with an offset become naive UTC; naive ones are taken as UTC already"""
+    value = pd.Timestamp(value)
+    return value.tz_convert("UTC").tz_localize(None) if value.tzinfo is not None else value
+
+
+class RowFilter:
+    """
+    Restrict a source to some devices and a [start, end) time range.
+
+    For Arrow datasets the filter becomes a dataset expression, so Parquet
+    row groups (and hive partitions) whose statistics fall outside it are
+    never read. Conditions that cannot be pushed down, e.g. on string
+    timestamps, are applied to the loaded frame instead. Bounds are compared
+    as naive UTC, whatever offset they were given with.
+    """
+
+    def __init__(self, device_ids: Optional[Sequence[str]] = None,
+                 start: Optional[Union[str, datetime]] = None,
+                 end: Optional[Union[str, datetime]] = None):
+        self.device_ids = list(device_ids) if device_ids else None
+        self.start = _naive_utc(start) if start is not None else None
+        self.end = _naive_utc(end) if end is not None else None
+
+    @classmethod
+    def from_params(cls, device_id: Optional[str] = None, start=None, end=None) -> Optional["RowFilter"]:
+        """Build a filter from query parameters; device_id may be comma-separated"""
+        device_ids = [d.strip() for d in device_id.split(",") if d.strip()] if device_id else None
+        if not device_ids and start is None and end is None:
+            return None
+        return cls(device_ids, start, end)
+
+    def key(self) -> str:
+        """Stable description used in result cache keys"""
+        devices = ",".join(sorted(self.device_ids)) if self.device_ids else "*"
+        return f"devices={devices}:start={self.start}:end={self.end}"
+
+    def _bound(self, value: pd.Timestamp, arrow_type):
+        import pyarrow as pa
+
+        if arrow_type.tz is not None:
+            value = value.tz_localize("UTC")
+        return pa.scalar(value.to_pydatetime(), type=arrow_type)
+
+    def expression(self, schema) -> Tuple[Optional[object], bool]:
+        """(dataset filter expression, whether `apply` is still needed afterwards)"""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expression, residual = None, False
+
+        def conjoin(condition):
+            return condition if expression is None else expression & condition
+
+        if self.device_ids:
+            if "device_id" in schema.names:
+                expression = conjoin(ds.field("device_id").isin(self.device_ids))
+            else:
+                residual = True
+        if self.start is not None or self.end is not None:
+            field = schema.field("timestamp") if "timestamp" in schema.names else None
+            if field is not None and pa.types.is_timestamp(field.type):
+                if self.start is not None:
+                    expression = conjoin(ds.field("timestamp") >= self._bound(self.start, field.type))
+                if self.end is not None:
+                    expression = conjoin(ds.field("timestamp") < self._bound(self.end, field.type))
+            else:
+                residual = True
+        return expression, residual
+
+    def apply(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Filter an already-loaded frame"""
+        mask = pd.Series(True, index=data.index)
+        if self.device_ids:
+            mask &= data["device_id"].astype(str).isin(self.device_ids)
+        if self.start is not None or self.end is not None:
+            timestamps = pd.to_datetime(data["timestamp"])
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+            if self.start is not None:
+                mask &= timestamps >= self.start
+            if self.end is not None:
+                mask &= timestamps < self.end
+        return data if mask.all() else data[mask]
+
+
+def source_files(source: str) -> List[str]:
+    """The files behind a source path: itself, or every file under a dataset directory"""
+    if not os.path.isdir(source):
+        return [source]
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(source)
+        for name in names if not name.startswith((".", "_"))
+    )
+
+
+def open_dataset(source: str, file_format: str):
+    """
+    Open a Parquet or Arrow IPC file/directory as a pyarrow dataset.
+
+    Files are memory-mapped, so only the pages of the projected columns in
+    the selected row groups are touched; directories use hive partitioning
+    (e.g. device_id=device_1/) when present.
+    """
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    return ds.dataset(
+        os.path.abspath(source),
+        format=file_format,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        partitioning="hive" if os.path.isdir(source) else None
+    )
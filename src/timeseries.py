@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# One record per sample; packed so a week of 1 Hz data is ~12 MB per device on disk
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('cpu', '<f4'),
+    ('mem', '<f4'),
+    ('combined_load', '<f4'),
+    ('sentiment', 'i1')
+])
+
+SENTIMENT_CODES = {'Normal': 0, 'Stressed': 1, 'Fatigued': 2, 'Critical': 3}
+# Indexed by code
+SENTIMENT_NAMES = sorted(SENTIMENT_CODES, key=SENTIMENT_CODES.get)
+
+
+class DeviceSeries:
+    """
+    Metric history for one device.
+
+    Samples are written into a preallocated NumPy ring of `ring_rows`
+    records (O(1) append). Every `spill_rows` samples the not-yet-persisted
+    span is appended to the newest segment file, and segments roll over
+    every `segment_rows` records. The ring keeps the most recent samples in
+    RAM for `latest`; range queries read older data from the segments
+    through read-only memory maps, so RAM is bounded by the ring size per
+    device however much history is kept.
+
+    Devices send their own timestamps, so samples can arrive late. The
+    unpersisted span is kept sorted, which absorbs reordering within one
+    spill window. A sample older than the newest persisted one would break
+    the segments' ordering, so it is dropped and counted in
+    `stats["late_dropped"]`.
+    """
+
+    def __init__(self, directory: str, ring_rows: int = 3600, segment_rows: int = 86400,
+                 spill_rows: Optional[int] = None):
+        self.directory = directory
+        self.ring_rows = ring_rows
+        self.segment_rows = segment_rows
+        self.spill_rows = min(spill_rows or ring_rows // 2, ring_rows)
+        self._ring = np.zeros(ring_rows, dtype=RECORD_DTYPE)
+        self._written = 0
+        self._spilled = 0
+        self._lock = threading.Lock()
+        self.stats = {"late_dropped": 0}
+        # [path, first timestamp, last timestamp, rows] for each segment, oldest first
+        self.segments: List[list] = []
+        self._load_segments()
+
+    def _load_segments(self):
+        if not os.path.isdir(self.directory):
+            return
+        names = sorted(name for name in os.listdir(self.directory) if re.fullmatch(r"\d+\.seg", name))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            rows = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            if rows == 0:
+                continue
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(rows,))
+            self.segments.append([path, float(records['timestamp'][0]), float(records['timestamp'][-1]), rows])
+
+    @property
+    def _persisted_until(self) -> float:
+        return self.segments[-1][2] if self.segments else -np.inf
+
+    def _pending_last(self) -> float:
+        if self._written == self._spilled:
+            return -np.inf
+        return float(self._ring['timestamp'][(self._written - 1) % self.ring_rows])
+
+    def append(self, timestamp: float, cpu: float, mem: float, combined_load: float, sentiment: int):
+        with self._lock:
+            if timestamp < self._persisted_until:
+                self.stats["late_dropped"] += 1
+                return
+            out_of_order = timestamp < self._pending_last()
+            self._ring[self._written % self.ring_rows] = (timestamp, cpu, mem, combined_load, sentiment)
+            self._written += 1
+            if out_of_order:
+                self._sort_pending()
+            if self._written - self._spilled >= self.spill_rows:
+                self._spill()
+
+    def extend(self, records: np.ndarray):
+        """Append a block of RECORD_DTYPE records in any order"""
+        records = records[np.argsort(records['timestamp'], kind='stable')]
+        with self._lock:
+            offset = 0
+            while offset < len(records):
+                # A spill may have just persisted samples newer than the rest of this block
+                late = int(np.searchsorted(records['timestamp'][offset:], self._persisted_until, side='left'))
+                self.stats["late_dropped"] += late
+                offset += late
+                if offset == len(records):
+                    break
+                out_of_order = records['timestamp'][offset] < self._pending_last()
+                # Never overwrite samples that have not been spilled yet
+                take = min(len(records) - offset, self.spill_rows - (self._written - self._spilled))
+                positions = np.arange(self._written, self._written + take) % self.ring_rows
+                self._ring[positions] = records[offset:offset + take]
+                self._written += take
+                offset += take
+                if out_of_order:
+                    self._sort_pending()
+                if self._written - self._spilled >= self.spill_rows:
+                    self._spill()
+
+    def _sort_pending(self):
+        """Restore time order in the unpersisted span after a late sample landed in it"""
+        positions = np.arange(self._spilled, self._written) % self.ring_rows
+        span = self._ring[positions]
+        self._ring[positions] = span[np.argsort(span['timestamp'], kind='stable')]
+
+    def flush(self):
+        """Persist buffered samples without waiting for the next spill"""
+        with self._lock:
+            if self._written > self._spilled:
+                self._spill()
+
+    def _ring_span(self, start: int, stop: int) -> np.ndarray:
+        """Copy absolute sample positions [start, stop) out of the ring"""
+        indices = np.arange(start, stop) % self.ring_rows
+        return self._ring[indices]
+
+    def _spill(self):
+        """Append the unpersisted span to the newest segment, rolling over when it is full"""
+        records = self._ring_span(self._spilled, self._written)
+        if not self.segments or self.segments[-1][3] >= self.segment_rows:
+            os.makedirs(self.directory, exist_ok=True)
+            index = int(os.path.basename(self.segments[-1][0]).split('.')[0]) + 1 if self.segments else 0
+            path = os.path.join(self.directory, f"{index:08d}.seg")
+            self.segments.append([path, float(records['timestamp'][0]), float(records['timestamp'][0]), 0])
+
+        segment = self.segments[-1]
+        with open(segment[0], 'ab') as f:
+            f.write(records.tobytes())
+        segment[2] = float(records['timestamp'][-1])
+        segment[3] += len(records)
+        self._spilled = self._written
+
+    def __len__(self) -> int:
+        return sum(segment[3] for segment in self.segments) + self._written - self._spilled
+
+    def latest(self, n: int) -> np.ndarray:
+        """The last `n` samples (at most `ring_rows`) straight from memory"""
+        with self._lock:
+            n = min(n, self._written, self.ring_rows)
+            return self._ring_span(self._written - n, self._written)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Records with start <= timestamp < end, oldest first"""
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._lock:
+            segments = [list(segment) for segment in self.segments]
+            pending = self._ring_span(self._spilled, self._written)
+
+        parts = []
+        for path, first, last, rows in segments:
+            # Skip whole segments outside the range without touching their pages
+            if last < start or first >= end:
+                continue
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(rows,))
+            parts.append(_time_slice(records, start, end))
+        parts.append(_time_slice(pending, start, end))
+        return np.concatenate(parts)
+
+
+def _time_slice(records: np.ndarray, start: float, end: float) -> np.ndarray:
+    # Segments and the pending span are kept in time order, so a binary search bounds the range
+    lo, hi = np.searchsorted(records['timestamp'], [start, end], side='left')
+    return np.array(records[lo:hi])
+
+
+def downsample(records: np.ndarray, step: float) -> Dict[str, np.ndarray]:
+    """
+    Average records into buckets of `step` seconds.
+
+    Returns bucket start times, per-bucket means of cpu/mem/combined_load,
+    the highest sentiment code, and the sample count.
+    """
+    if len(records) == 0:
+        empty = np.zeros(0)
+        return {"timestamp": empty, "cpu": empty, "mem": empty, "combined_load": empty,
+                "sentiment": np.zeros(0, dtype=np.int8), "count": np.zeros(0, dtype=np.int64)}
+
+    buckets = np.floor(records['timestamp'] / step)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(records)])
+    result = {"timestamp": buckets[starts] * step, "count": counts}
+    for column in ('cpu', 'mem', 'combined_load'):
+        result[column] = np.add.reduceat(records[column].astype(np.float64), starts) / counts
+    result["sentiment"] = np.maximum.reduceat(records['sentiment'], starts)
+    return result
+
+
+class TimeSeriesStore:
+    """
+    Per-device metric history with bounded RAM and memory-mapped on-disk segments.
+
+    Each device's segments live in a directory named by the SHA-1 of its id,
+    so any id maps to its own directory inside `path`. The readable ids are
+    kept in `manifest.jsonl`, one ``{"dir", "device_id"}`` line per device.
+    """
+
+    MANIFEST = "manifest.jsonl"
+
+    def __init__(self, path: str, ring_rows: int = 3600, segment_rows: int = 86400):
+        self.path = path
+        self.ring_rows = ring_rows
+        self.segment_rows = segment_rows
+        self.devices: Dict[str, DeviceSeries] = {}
+        self._lock = threading.Lock()
+        # Directory name -> device id
+        self.manifest: Dict[str, str] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        manifest = {}
+        path = os.path.join(self.path, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted write
+                    manifest[entry["dir"]] = entry["device_id"]
+        return manifest
+
+    def _record_device(self, name: str, device_id: str):
+        """Add a manifest line; the caller holds the lock"""
+        if name in self.manifest:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.MANIFEST), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"dir": name, "device_id": device_id}) + "\n")
+        self.manifest[name] = device_id
+
+    @staticmethod
+    def _dir_name(device_id: str) -> str:
+        return hashlib.sha1(device_id.encode("utf-8")).hexdigest()
+
+    def _device_dir(self, device_id: str) -> str:
+        return os.path.join(self.path, self._dir_name(device_id))
+
+    def series(self, device_id: str) -> DeviceSeries:
+        series = self.devices.get(device_id)
+        if series is None:
+            with self._lock:
+                series = self.devices.get(device_id)
+                if series is None:
+                    self._record_device(self._dir_name(device_id), device_id)
+                    series = DeviceSeries(self._device_dir(device_id), self.ring_rows, self.segment_rows)
+                    self.devices[device_id] = series
+        return series
+
+    def existing(self, device_id: str) -> Optional[DeviceSeries]:
+        """The device's series if it has been ingested or has history on disk; never creates one"""
+        series = self.devices.get(device_id)
+        if series is None and self._dir_name(device_id) in self.manifest:
+            series = self.series(device_id)
+        return series
+
+    def append(self, device_id: str, timestamp: float, cpu: float, mem: float,
+               combined_load: float, sentiment: str):
+        self.series(device_id).append(timestamp, cpu, mem, combined_load, SENTIMENT_CODES.get(sentiment, -1))
+
+    def query(self, device_id: str, start: Optional[float] = None, end: Optional[float] = None,
+              step: Optional[float] = None):
+        """Raw records in [start, end), or bucketed means when `step` seconds is given"""
+        series = self.existing(device_id)
+        records = series.query(start, end) if series else np.zeros(0, dtype=RECORD_DTYPE)
+        return downsample(records, step) if step else records
+
+    def latest(self, device_id: str, n: int = 1) -> np.ndarray:
+        series = self.existing(device_id)
+        return series.latest(n) if series else np.zeros(0, dtype=RECORD_DTYPE)
+
+    def flush(self):
+        for series in list(self.devices.values()):
+            series.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        series = list(self.devices.values())
+        return {"series": len(series), "late_dropped": sum(s.stats["late_dropped"] for s in series)}
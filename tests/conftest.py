@@ -0,0 +1,36 @@
+import pytest
+
+from ai_analyzer import DeviceAnalyzer
+from src.config import settings
+from src.model_store import ModelStore
+
+
+@pytest.fixture
+def make_device_analyzer(tmp_path, monkeypatch):
+    """Build DeviceAnalyzers that keep history and models under tmp_path; each is stopped afterwards"""
+    monkeypatch.setattr(settings, "TIMESERIES_PATH", str(tmp_path / "timeseries"))
+    # Out of reach for short tests, so no background refit is still running at shutdown
+    monkeypatch.setattr(settings, "MODEL_MIN_SAMPLES", 1000)
+    analyzers = []
+
+    def make(simulate=False):
+        analyzer = DeviceAnalyzer(model_store=ModelStore(str(tmp_path / "models")), simulate=simulate)
+        analyzers.append(analyzer)
+        return analyzer
+
+    yield make
+    for analyzer in analyzers:
+        analyzer.stop()
+
+
+@pytest.fixture
+def device_analyzer(make_device_analyzer):
+    return make_device_analyzer()
+
+
+@pytest.fixture
+def constant_classifier():
+    """Stands in for the sentiment model, which isn't downloaded in tests"""
+    def classify(texts, **kwargs):
+        return [{"label": "POSITIVE", "score": 1.0} for _ in texts]
+    return classify
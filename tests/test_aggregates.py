@@ -0,0 +1,104 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ai_analyzer import DeviceAnalyzer
+from src.aggregates import AnalysisAggregate, InsightsAggregator
+from src.data_handlers.sample_data import generate_sample_data_fast
+from src.data_pipeline import DataPipeline
+from src.partitioned import split_partitions
+
+COLUMNS = ["temperature", "humidity", "pressure"]
+
+
+def assert_same(actual, expected):
+    """Equal up to float summation order"""
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for left, right in zip(actual, expected):
+            assert_same(left, right)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected)
+    else:
+        assert actual == expected
+
+
+@pytest.fixture(scope="module")
+def data():
+    # 2000 one-minute rows span more than the 1h window's horizon, so pruning is exercised
+    return DataPipeline()._clean_data(generate_sample_data_fast(2000, end="2024-01-01"))
+
+
+@pytest.mark.parametrize("partition_by", ["device_id", "rows"])
+def test_merged_partitions_match_one_pass(data, partition_by):
+    whole = InsightsAggregator(COLUMNS).update(data)
+
+    merged = InsightsAggregator(COLUMNS)
+    for partition in split_partitions(data, partition_by, 4):
+        merged.merge(InsightsAggregator(COLUMNS).update(partition))
+
+    assert_same(merged.result(), whole.result())
+
+
+def test_chunked_updates_match_one_pass(data):
+    whole = InsightsAggregator(COLUMNS).update(data)
+
+    chunked = InsightsAggregator(COLUMNS)
+    for start in range(0, len(data), 300):
+        chunked.update(data.iloc[start:start + 300])
+
+    assert_same(chunked.result(), whole.result())
+
+
+def test_merge_keeps_only_buckets_inside_the_horizon(data):
+    merged = InsightsAggregator(COLUMNS)
+    for partition in split_partitions(data, "rows", 4):
+        merged.merge(InsightsAggregator(COLUMNS).update(partition))
+
+    oldest = min(min(buckets) for buckets in merged.buckets.values())
+    assert oldest > merged.latest_bucket - merged.horizon
+    assert merged.total_records == len(data)
+
+
+def test_analysis_aggregate_merge_adds_counts(data):
+    left, right = data.iloc[:700], data.iloc[700:]
+    merged = AnalysisAggregate(COLUMNS).update(left, score_anomalies=False)
+    merged.merge(AnalysisAggregate(COLUMNS).update(right, score_anomalies=False))
+
+    whole = AnalysisAggregate(COLUMNS).update(data, score_anomalies=False)
+    assert merged.status_counts == whole.status_counts
+    for col in COLUMNS:
+        assert merged.column_stats[col].mean == pytest.approx(whole.column_stats[col].mean)
+        assert merged.column_stats[col].std == pytest.approx(whole.column_stats[col].std)
+
+
+def test_live_insights_fold_ingested_batches_and_ticks(make_device_analyzer):
+    analyzer = make_device_analyzer(simulate=True)
+    rng = np.random.default_rng(0)
+    samples = [
+        {"device_id": f"device_{i % 2}", "cpu_usage": float(cpu), "memory_usage": float(mem)}
+        for i, (cpu, mem) in enumerate(rng.uniform(0, 100, (40, 2)))
+    ]
+
+    async def ticks(count):
+        for _ in range(count):
+            await analyzer.build_tick()
+
+    aggregator = analyzer.insights
+    analyzer.ingest_batch(samples[:25])
+    asyncio.run(ticks(3))
+    analyzer.ingest_batch(samples[25:])
+    insights = analyzer.live_insights()
+
+    assert analyzer.insights is aggregator
+    assert insights["total_records"] == 43
+    summary = {}
+    for row in insights["device_summary"]:
+        summary[row["device_id"]] = summary.get(row["device_id"], 0) + row["count"]
+    assert summary == {"device_0": 20, "device_1": 20, DeviceAnalyzer.DEVICE_ID: 3}
+    assert analyzer.live_insights()["total_records"] == 43
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregates import AnalysisAggregate
+from src.anomaly import zscore_anomalies
+from src.serialization import dumps
+
+COLUMNS = ["temperature", "humidity"]
+
+
+def legacy_anomalies(data):
+    """The original per-column AIAnalyzer._find_anomalies on float64 data"""
+    results = {}
+    for column in COLUMNS:
+        series = data[column]
+        z_scores = np.abs((series - series.mean()) / series.std())
+        anomalies = series[z_scores > 3]
+        results[column] = {
+            "count": int(len(anomalies)),
+            "values": {str(k): float(v) for k, v in anomalies.head(5).items()}
+        }
+    return results
+
+
+@pytest.fixture
+def readings():
+    # Sensor readings as devices report them, to one decimal place
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({column: np.round(rng.normal(25, 2, 2000), 1) for column in COLUMNS})
+    data.loc[[17, 400, 1999], "temperature"] = [49.7, 0.3, 44.2]
+    data.loc[[5, 1200], "humidity"] = [61.9, -3.1]
+    return data
+
+
+def test_float32_columns_report_the_values_that_were_read(readings):
+    expected = legacy_anomalies(readings)
+    assert expected["temperature"]["values"]["17"] == 49.7
+
+    assert dumps(zscore_anomalies(readings.astype(np.float32), COLUMNS)) == dumps(expected)
+    assert dumps(zscore_anomalies(readings, COLUMNS)) == dumps(expected)
+
+
+def test_streamed_anomalies_keep_column_precision(readings):
+    chunk = readings.astype(np.float32).assign(
+        timestamp=pd.date_range("2024-01-01", periods=len(readings), freq="min"),
+        device_id="device_1",
+        status="normal"
+    )
+
+    aggregate = AnalysisAggregate(COLUMNS).update(chunk)
+
+    assert dumps(aggregate.anomalies) == dumps(legacy_anomalies(readings))
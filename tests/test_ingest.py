@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import threading
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.devices import to_epoch
+from src.ingest import IngestServer, valid_sample
+from src.timeseries import RECORD_DTYPE, DeviceSeries, TimeSeriesStore
+
+VALID = {"device_id": "device_1", "cpu_usage": 40.0, "memory_usage": 55, "timestamp": 1700000000}
+
+
+@pytest.mark.parametrize("sample", [
+    VALID,
+    {"cpu_usage": 1, "memory_usage": 2},
+    {**VALID, "device_id": 7, "timestamp": "2024-01-01T00:00:00Z"},
+])
+def test_valid_samples(sample):
+    assert valid_sample(sample)
+
+
+@pytest.mark.parametrize("sample", [
+    "not a dict",
+    [VALID],
+    {"device_id": "device_1", "cpu_usage": 40.0},
+    {**VALID, "cpu_usage": "40"},
+    {**VALID, "memory_usage": float("nan")},
+    {**VALID, "cpu_usage": True},
+    {**VALID, "device_id": ["device_1"]},
+    {**VALID, "timestamp": {"seconds": 1}},
+    {**VALID, "device_id": ""},
+    {**VALID, "device_id": ".."},
+])
+def test_invalid_samples(sample):
+    assert not valid_sample(sample)
+
+
+async def send(server, payloads, pause=0.0):
+    port = server.server.sockets[0].getsockname()[1]
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    for payload in payloads:
+        writer.write(payload)
+        await writer.drain()
+        await asyncio.sleep(pause)
+    writer.close()
+    await writer.wait_closed()
+    for _ in range(100):
+        if not server._connections:
+            break
+        await asyncio.sleep(0.01)
+
+
+def run_server(handle_batch, payloads, pause=0.0, **options):
+    async def main():
+        server = IngestServer(handle_batch, host="127.0.0.1", port=0, **options)
+        await server.start()
+        try:
+            await send(server, payloads, pause)
+        finally:
+            await server.stop()
+        return server
+
+    return asyncio.run(main())
+
+
+def test_ndjson_skips_malformed_lines_and_samples():
+    received = []
+    lines = [
+        json.dumps(VALID),
+        "{not json",
+        json.dumps([VALID, {"cpu_usage": "high"}, {**VALID, "device_id": "device_2"}]),
+        json.dumps({"memory_usage": 3}),
+        "",
+    ]
+
+    server = run_server(received.extend, ["\n".join(lines).encode()])
+
+    assert [sample["device_id"] for sample in received] == ["device_1", "device_1", "device_2"]
+    assert server.stats["samples"] == 3
+    assert server.stats["rejected"] == 3
+    assert server.stats["errors"] == 0
+
+
+def test_unterminated_ndjson_line_closes_the_connection():
+    received = []
+    payload = (json.dumps(VALID) + "\n").encode() + b'{"cpu_usage": ' + b"1" * 5000
+
+    server = run_server(received.extend, [payload], max_line_bytes=1024)
+
+    assert received == [VALID]
+    assert server.stats["oversized"] == 1
+    assert server.stats["rejected"] == 0
+    assert not server._connections
+
+
+def test_msgpack_samples_are_validated():
+    received = []
+    payload = msgpack.packb([VALID, {"cpu_usage": None, "memory_usage": 1}]) + msgpack.packb(VALID)
+
+    server = run_server(received.extend, [payload])
+
+    assert len(received) == 2
+    assert server.stats["rejected"] == 1
+
+
+def test_failing_batch_keeps_the_connection_open():
+    received = []
+
+    async def handle_batch(samples):
+        if not received:
+            received.append(None)
+            raise RuntimeError("store unavailable")
+        received.extend(samples)
+
+    line = (json.dumps(VALID) + "\n").encode()
+    server = run_server(handle_batch, [line, line], pause=0.05)
+
+    assert received[1:] == [VALID]
+    assert server.stats["errors"] == 1
+    assert server.stats["connections"] == 1
+
+
+def test_to_epoch_coerces_each_value_of_a_mixed_batch():
+    timestamps = to_epoch([1700000000, "1700000001.5", "2024-01-01T00:00:00Z", "2024-01-01 01:00", None, "soon"])
+
+    expected = pd.Timestamp("2024-01-01", tz="UTC").timestamp()
+    assert timestamps[:4].tolist() == [1700000000.0, 1700000001.5, expected, expected + 3600]
+    assert np.all(timestamps[4:] > expected)
+
+
+def records(timestamps):
+    block = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+    block['timestamp'] = timestamps
+    return block
+
+
+def test_late_samples_keep_the_series_ordered(tmp_path):
+    series = DeviceSeries(str(tmp_path), ring_rows=8, spill_rows=4)
+
+    series.extend(records([3, 1, 2]))
+    series.append(0.5, 0, 0, 0, 0)
+    # 0.5..3 are persisted now, so 2.5 is too late; 4 still fits in the ring
+    series.extend(records([10, 5, 2.5]))
+    series.append(4, 0, 0, 0, 0)
+
+    stored = series.query()['timestamp'].tolist()
+    assert stored == sorted(stored)
+    assert stored == [0.5, 1, 2, 3, 4, 5, 10]
+    assert series.stats["late_dropped"] == 1
+
+
+def test_device_directories_stay_inside_the_store_and_never_collide(tmp_path):
+    path = str(tmp_path / "timeseries")
+    store = TimeSeriesStore(path, ring_rows=4)
+    ids = ["..", "../outside", "/etc", "dev 1", "dev_1"]
+    for i, device_id in enumerate(ids):
+        store.series(device_id).extend(records([i]))
+    store.flush()
+
+    directories = {store._device_dir(device_id) for device_id in ids}
+    assert len(directories) == len(ids)
+    assert all(os.path.dirname(directory) == path for directory in directories)
+    assert not (tmp_path / "outside").exists()
+
+    reopened = TimeSeriesStore(path, ring_rows=4)
+    assert sorted(reopened.manifest.values()) == sorted(ids)
+    for i, device_id in enumerate(ids):
+        assert reopened.series(device_id).query()['timestamp'].tolist() == [i]
+
+
+def test_reads_of_unknown_devices_allocate_nothing(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "timeseries"), ring_rows=4)
+    store.series("device_1").extend(records([1, 2]))
+
+    assert len(store.query("no_such_device")) == 0
+    assert store.query("no_such_device", step=60)["count"].tolist() == []
+    assert len(store.latest("no_such_device")) == 0
+    assert list(store.devices) == ["device_1"]
+    assert store.query("device_1")['timestamp'].tolist() == [1, 2]
+
+
+def test_ingest_batch_runs_off_the_event_loop(device_analyzer, monkeypatch):
+    samples = [{**VALID, "device_id": f"device_{i % 3}", "timestamp": 1700000000 + i} for i in range(30)]
+    threads = []
+    ingest_batch = device_analyzer.ingest_batch
+
+    def recording_ingest_batch(batch):
+        threads.append(threading.current_thread().name)
+        return ingest_batch(batch)
+
+    monkeypatch.setattr(device_analyzer, "ingest_batch", recording_ingest_batch)
+
+    async def main():
+        return await device_analyzer.ingest_batch_async(samples)
+
+    assert asyncio.run(main()) == 30
+    assert threads[0].startswith("ingest")
+    devices = sorted(snapshot["device_id"] for snapshot in device_analyzer.device_snapshots())
+    assert devices == ["device_0", "device_1", "device_2"]
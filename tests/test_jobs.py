@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from src.jobs import JobManager
+
+
+def blocking(started: threading.Event, release: threading.Event):
+    def fn():
+        started.set()
+        release.wait(5)
+        return "done"
+    return fn
+
+
+async def until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_cancelled_run_keeps_its_slot_until_the_thread_returns():
+    jobs = JobManager(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def main():
+        first = asyncio.create_task(jobs.run(blocking(started, release)))
+        await until(started.is_set)
+        first.cancel()
+        second = asyncio.create_task(jobs.run(lambda: "second"))
+        await asyncio.sleep(0.05)
+
+        # The first thread is still running, so the second job must not have started
+        assert not second.done()
+        assert jobs.stats["running"] == 1
+        release.set()
+        assert await asyncio.wait_for(second, 5) == "second"
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert jobs.stats["cancelled"] == 1
+    assert jobs.stats["completed"] == 1
+    assert jobs.stats["running"] == 0
+
+
+def test_cancelled_background_job_is_marked_cancelled():
+    jobs = JobManager(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def main():
+        job = jobs.submit(blocking(started, release))
+        await until(started.is_set)
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+        await until(lambda: job["finished_at"] is not None)
+        release.set()
+        await until(lambda: jobs.stats["running"] == 0)
+        return job
+
+    job = asyncio.run(main())
+    assert job["status"] == "cancelled"
+    assert job["result"] is None
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from ai_analyzer import AIAnalyzer
+from src.data_handlers.sample_data import generate_sample_data_fast
+from src.data_pipeline import DataPipeline
+from src.partitioned import run_partitioned, shutdown_pools
+from src.serialization import dumps
+from src.sources import RowFilter
+
+
+def comparable(analysis):
+    """The response as parsed JSON, without the live inference counters"""
+    result = json.loads(dumps(analysis))
+    result["classifications"].pop("inference_stats")
+    return result
+
+
+@pytest.fixture(scope="module")
+def pipeline(tmp_path_factory):
+    data_root = tmp_path_factory.mktemp("data")
+    frame = generate_sample_data_fast(3000, end="2024-01-01")
+    frame.to_parquet(data_root / "sample.parquet", index=False, row_group_size=400)
+    yield DataPipeline(data_root=str(data_root))
+    shutdown_pools()
+
+
+@pytest.mark.parametrize("group_by", [None, "device_id"])
+@pytest.mark.parametrize("partition_by", ["device_id", "rows"])
+@pytest.mark.parametrize("row_filter", [None, RowFilter(["device_1", "device_3"], "2023-12-31 20:00", None)])
+def test_workers_loading_their_own_partitions_match_the_serial_run(pipeline, constant_classifier,
+                                                                   group_by, partition_by, row_filter):
+    analyzer = AIAnalyzer(text_classifier=constant_classifier, anomaly_group_by=group_by)
+    serial = analyzer.analyze(pipeline.process("sample.parquet", row_filter=row_filter,
+                                               columns=analyzer.analysis_columns))
+
+    partitioned = run_partitioned(pipeline, analyzer, "sample.parquet", partition_by=partition_by,
+                                  max_workers=3, row_filter=row_filter)
+
+    assert comparable(partitioned) == comparable(serial)
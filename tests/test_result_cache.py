@@ -0,0 +1,85 @@
+import pytest
+
+import src.main as main
+from src.data_handlers.sample_data import generate_sample_data_fast
+from src.data_pipeline import DataPipeline
+from src.result_cache import ResultCache
+
+
+def write_sample_csv(path, rows):
+    generate_sample_data_fast(rows, end="2024-01-01").to_csv(path, index=False)
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, constant_classifier):
+    write_sample_csv(tmp_path / "sample.csv", 500)
+    pipeline = DataPipeline(data_root=str(tmp_path))
+    pipeline.result_cache = ResultCache()
+    monkeypatch.setattr(main, "pipeline", pipeline)
+    monkeypatch.setattr(main.analyzer, "_text_classifier", constant_classifier)
+    return pipeline
+
+
+def test_sample_source_is_never_cached(pipeline):
+    assert pipeline.cache_key("sample", "serial") is None
+
+    main.run_analysis("sample")
+    response = main.run_analysis("sample")
+
+    assert response["metrics"]["cached"] is False
+    assert len(pipeline.result_cache._memory) == 0
+
+
+def test_key_covers_run_mode_filter_and_analyzer_config(pipeline):
+    config = main.analyzer.config_key()
+    keys = {
+        pipeline.cache_key("sample.csv", None, "serial", config),
+        pipeline.cache_key("sample.csv", None, "parallel:device_id", config),
+        pipeline.cache_key("sample.csv", None, "parallel:rows", config),
+        pipeline.cache_key("sample.csv", "device_ids=device_1", "serial", config),
+        pipeline.cache_key("sample.csv", None, "serial", config + ":robust=True"),
+    }
+
+    assert len(keys) == 5
+    assert pipeline.cache_key("sample.csv", None, "serial", config) in keys
+
+
+def test_key_changes_when_the_source_is_rewritten(pipeline, tmp_path):
+    before = pipeline.cache_key("sample.csv", "serial")
+    write_sample_csv(tmp_path / "sample.csv", 600)
+
+    assert pipeline.cache_key("sample.csv", "serial") != before
+
+
+def test_serial_and_partitioned_runs_are_cached_separately(pipeline):
+    assert main.run_analysis("sample.csv")["metrics"]["cached"] is False
+    assert main.run_analysis("sample.csv")["metrics"]["cached"] is True
+
+    partitioned = main.run_analysis("sample.csv", parallel=True)
+    assert partitioned["metrics"]["cached"] is False
+    assert main.run_analysis("sample.csv", parallel=True, partition_by="rows")["metrics"]["cached"] is False
+
+
+def test_hits_report_current_inference_stats(pipeline):
+    main.run_analysis("sample.csv")
+    main.analyzer.inference_engine.classify_texts(["a note the cache has not seen"])
+
+    response = main.run_analysis("sample.csv")
+
+    assert response["metrics"]["cached"] is True
+    stats = response["analysis"]["classifications"]["inference_stats"]
+    assert stats == main.analyzer.inference_engine.get_stats()
+    (_, stored), = pipeline.result_cache._memory.values()
+    assert "inference_stats" not in stored["classifications"]
+
+
+def test_failed_disk_write_is_logged_and_leaves_no_temporary_file(tmp_path, caplog):
+    cache = ResultCache(disk_path=str(tmp_path))
+    unpicklable = lambda: None  # noqa: E731
+
+    cache.put("key", unpicklable)
+
+    assert cache.get("key") is unpicklable
+    assert cache.get_metrics()["cache_disk_errors"] == 1
+    assert "disk write failed" in caplog.text
+    assert list(tmp_path.iterdir()) == []
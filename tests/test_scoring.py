@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+
+from src.scoring import BatchScorer
+
+
+class SumModel:
+    """Scores rows by their sum minus 10, and counts calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def decision_function(self, rows):
+        self.calls.append(len(rows))
+        return np.asarray(rows).sum(axis=1) - 10
+
+
+def test_callers_with_nothing_to_coalesce_skip_the_window():
+    model = SumModel()
+    # A window this long would time the test out if any caller waited for it
+    scorer = BatchScorer(lambda: model, max_latency=60)
+
+    async def main():
+        return [await asyncio.wait_for(scorer.score([i, i]), timeout=5) for i in range(4, 7)]
+
+    assert asyncio.run(main()) == [(-1, -2.0), (1, 0.0), (1, 2.0)]
+    assert model.calls == [1, 1, 1]
+
+
+def test_rows_queued_behind_a_batch_are_scored_together():
+    model = SumModel()
+    scorer = BatchScorer(lambda: model, max_latency=60)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(scorer.score([i, 0]) for i in range(5))), timeout=5)
+
+    assert [prediction for prediction, _ in asyncio.run(main())] == [-1, -1, -1, -1, -1]
+    assert model.calls == [1, 4]
+    assert scorer.stats == {"rows": 5, "batches": 2, "max_batch": 4}
@@ -0,0 +1,106 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+from ai_analyzer import AIAnalyzer
+from src.data_handlers.sample_data import generate_sample_data_fast
+from src.config import settings
+from src.data_pipeline import DataPipeline
+from src.sources import RowFilter
+
+START = pd.Timestamp("2023-12-31 12:00")
+END = pd.Timestamp("2023-12-31 18:00")
+
+
+@pytest.fixture
+def frame():
+    return generate_sample_data_fast(2000, end="2024-01-01")
+
+
+@pytest.fixture
+def pipeline(tmp_path, frame):
+    frame.to_parquet(tmp_path / "sample.parquet", index=False, row_group_size=250)
+    frame.to_csv(tmp_path / "sample.csv", index=False)
+    return DataPipeline(data_root=str(tmp_path))
+
+
+def expected_rows(frame, devices=("device_1", "device_3")):
+    mask = frame["device_id"].isin(devices) & (frame["timestamp"] >= START) & (frame["timestamp"] < END)
+    return frame[mask]
+
+
+def sorted_keys(data):
+    keys = pd.DataFrame({
+        "timestamp": pd.to_datetime(data["timestamp"]).dt.tz_localize(None),
+        "device_id": data["device_id"].astype(str)
+    })
+    return keys.sort_values(["timestamp", "device_id"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("source", ["sample.parquet", "sample.csv"])
+def test_file_sources_load_only_matching_rows(pipeline, frame, source):
+    row_filter = RowFilter(["device_1", "device_3"], START, END)
+
+    loaded = pipeline._load_data(source, row_filter)
+
+    pd.testing.assert_frame_equal(sorted_keys(loaded), sorted_keys(expected_rows(frame)))
+
+
+def test_parquet_timestamps_are_filtered_by_the_dataset(pipeline, tmp_path):
+    schema = ds.dataset(str(tmp_path / "sample.parquet")).schema
+    _, residual = RowFilter(["device_1"], START, END).expression(schema)
+    assert residual is False
+
+    string_schema = pa.schema([("timestamp", pa.string()), ("device_id", pa.string())])
+    _, residual = RowFilter(None, START, END).expression(string_schema)
+    assert residual is True
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2023-12-31T14:00:00+02:00", "2023-12-31T20:00:00+02:00"),
+    (START.tz_localize("UTC").tz_convert("US/Eastern"), END.tz_localize("UTC")),
+])
+def test_bounds_with_an_offset_are_compared_in_utc(pipeline, frame, start, end):
+    row_filter = RowFilter(["device_1", "device_3"], start, end)
+
+    for source in ("sample.parquet", "sample.csv"):
+        loaded = pipeline._load_data(source, row_filter)
+        pd.testing.assert_frame_equal(sorted_keys(loaded), sorted_keys(expected_rows(frame)))
+    pd.testing.assert_frame_equal(sorted_keys(row_filter.apply(frame)), sorted_keys(expected_rows(frame)))
+
+
+def test_timezone_aware_columns_are_filtered(pipeline, frame, tmp_path):
+    aware = frame.assign(timestamp=frame["timestamp"].dt.tz_localize("UTC").dt.tz_convert("Asia/Tokyo"))
+    aware.to_parquet(tmp_path / "aware.parquet", index=False)
+    row_filter = RowFilter(["device_1", "device_3"], START, END)
+
+    for loaded in (pipeline._load_data("aware.parquet", row_filter), row_filter.apply(aware)):
+        keys = sorted_keys(loaded.assign(timestamp=loaded["timestamp"].dt.tz_convert("UTC")))
+        pd.testing.assert_frame_equal(keys, sorted_keys(expected_rows(frame)))
+
+
+def test_projection_keeps_the_analyzer_columns(pipeline, frame, tmp_path):
+    frame.assign(voltage=1.0, firmware="v1").to_parquet(tmp_path / "wide.parquet", index=False)
+    analyzer = AIAnalyzer(anomaly_columns=["temperature", "voltage"], anomaly_group_by="device_id")
+
+    default = pipeline._load_data("wide.parquet")
+    projected = pipeline._load_data("wide.parquet", columns=analyzer.analysis_columns)
+
+    assert "voltage" not in default.columns
+    assert "voltage" in projected.columns
+    assert "firmware" not in projected.columns
+    assert set(frame.columns) <= set(projected.columns)
+
+
+@pytest.mark.parametrize("row_filter", [None, RowFilter(["device_1", "device_3"], START, END)])
+def test_streamed_chunks_match_the_one_shot_load(pipeline, monkeypatch, row_filter):
+    monkeypatch.setattr(settings, "BATCH_SIZE", 300)
+
+    whole = pipeline.process("sample.parquet", row_filter=row_filter)
+    chunks = list(pipeline.process("sample.parquet", stream=True, row_filter=row_filter))
+
+    assert len(chunks) > 1
+    streamed = pd.concat(chunks)
+    assert streamed.index.is_unique
+    pd.testing.assert_frame_equal(streamed, whole, check_dtype=False, check_categorical=False)
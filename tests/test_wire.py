@@ -0,0 +1,94 @@
+import json
+
+import msgpack
+import pytest
+
+from src.broadcast import Broadcaster
+from src.timeseries import SENTIMENT_CODES
+from src.wire import JSON, MSGPACK, MSGPACK_SUBPROTOCOL, decode_frame, encode_samples, negotiated_format
+
+SAMPLES = [
+    ("device_1", 1700000000.1234, 12.3456, 67.8912, 29.0, SENTIMENT_CODES["Normal"]),
+    ("device_2", 1700000002.5, 99.999, 0.0, 70.0, SENTIMENT_CODES["Critical"]),
+]
+
+
+def test_frames_round_trip_to_hundredths_and_milliseconds():
+    decoded = decode_frame(encode_samples(SAMPLES, ml_enabled=True))
+
+    assert [row["device_id"] for row in decoded] == ["device_1", "device_2"]
+    assert [row["sentiment"] for row in decoded] == ["Normal", "Critical"]
+    for row, (_, timestamp, cpu, mem, load, _) in zip(decoded, SAMPLES):
+        assert row["timestamp"] == pytest.approx(timestamp, abs=0.0005)
+        assert row["cpu_usage"] == pytest.approx(cpu, abs=0.005)
+        assert row["memory_usage"] == pytest.approx(mem, abs=0.005)
+        assert row["combined_load"] == pytest.approx(load, abs=0.005)
+        assert row["ml_enabled"] is True
+
+
+def test_frames_are_self_contained_integers():
+    payload = msgpack.unpackb(encode_samples(SAMPLES, ml_enabled=False), raw=False)
+
+    assert payload["v"] == 1
+    assert payload["t"] == 1700000000123
+    assert payload["d"][1][1:] == [2377, 10000, 0, 7000, SENTIMENT_CODES["Critical"]]
+
+
+def test_empty_frames_and_unknown_codes():
+    assert decode_frame(encode_samples([], ml_enabled=False)) == []
+    decoded = decode_frame(encode_samples([("device_1", 1.0, 1.0, 1.0, 1.0, -1)], ml_enabled=False))
+    assert decoded[0]["sentiment"] is None
+
+
+def test_msgpack_rows_are_much_smaller_than_json():
+    rows = [("device_%d" % (i % 50), 1700000000 + i, 50.5, 60.25, 53.43, 0) for i in range(500)]
+    as_json = json.dumps([
+        {"device_id": device, "timestamp": "2023-11-14 22:13:20", "cpu_usage": cpu, "memory_usage": mem,
+         "combined_load": load, "sentiment": "Normal", "ml_enabled": False}
+        for device, _, cpu, mem, load, _ in rows
+    ])
+
+    assert len(encode_samples(rows, ml_enabled=False)) * 4 < len(as_json)
+
+
+def test_subprotocol_negotiation():
+    assert negotiated_format(MSGPACK_SUBPROTOCOL) == MSGPACK
+    assert negotiated_format(None) == JSON
+    assert negotiated_format("something-else") == JSON
+
+
+def test_device_frames_carry_only_the_focused_device(device_analyzer):
+    device_analyzer.ingest_batch([
+        {"device_id": "device_1", "cpu_usage": 10.0, "memory_usage": 20.0, "timestamp": 1700000000},
+        {"device_id": "device_2", "cpu_usage": 90.0, "memory_usage": 95.0, "timestamp": 1700000001},
+    ])
+
+    everyone = decode_frame(device_analyzer.encode_frame(None, 0.0, MSGPACK))
+    focused = decode_frame(device_analyzer.encode_frame(None, 0.0, MSGPACK, device="device_2"))
+
+    assert sorted(row["device_id"] for row in everyone) == ["device_1", "device_2"]
+    assert [(row["device_id"], row["sentiment"]) for row in focused] == [("device_2", "Critical")]
+    assert json.loads(device_analyzer.encode_frame(None, 0.0, JSON, device="device_1"))["cpu_usage"] == 10.0
+    assert device_analyzer.encode_frame(None, 0.0, MSGPACK, device="device_9") is None
+
+
+def test_each_subscriber_key_is_encoded_once():
+    broadcaster = Broadcaster(max_queue=4)
+    subscribers = [
+        broadcaster.subscribe(object(), JSON),
+        broadcaster.subscribe(object(), JSON),
+        broadcaster.subscribe(object(), MSGPACK),
+        broadcaster.subscribe(object(), MSGPACK, device="device_1"),
+    ]
+    calls = []
+
+    def encode(fmt, device, interval):
+        calls.append((fmt, device))
+        return f"{fmt}:{device}".encode()
+
+    broadcaster.publish_due(encode, now=0.0)
+
+    assert sorted(calls, key=str) == sorted([(JSON, None), (MSGPACK, None), (MSGPACK, "device_1")], key=str)
+    assert [list(subscriber.queue) for subscriber in subscribers] == [
+        [b"json:None"], [b"json:None"], [b"msgpack:None"], [b"msgpack:device_1"]
+    ]